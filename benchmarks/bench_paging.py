@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+Offline benchmarks of paging and pager rendering.
+
+Run from the root of the repository::
+
+    python benchmarks/bench_paging.py --output before.json
+    # ... change something ...
+    python benchmarks/bench_paging.py --output after.json --compare before.json
+
+Results are written as JSON, keyed by benchmark name, with the best and
+median time per call in microseconds. --compare prints the ratio to an
+earlier run and exits with status 1 if any benchmark got slower than
+--threshold.
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from pagedlist import PagedList  # noqa: E402
+from pagedlist import SimplePagedList  # noqa: E402
+from pagedlist.web.ajax import AjaxOptions  # noqa: E402
+from pagedlist.web.builder import Builder  # noqa: E402
+from pagedlist.web.options import CompiledRenderOptions  # noqa: E402
+from pagedlist.web.options import PagedListRenderOptions  # noqa: E402
+from pagedlist.web.renderer import PagerRenderer  # noqa: E402
+from pagedlist.web.urls import PageUrlTemplate  # noqa: E402
+
+PAGE_SIZES = (10, 50, 250)
+SUPERSET_SIZE = 100000
+SQLITE_ROWS = 100000
+SQLITE_PAGE_SIZE = 20
+
+
+def _measure(fn, repeat, min_time):
+    # Grows the number of calls per run until a run takes min_time, like
+    # timeit's autorange, which Python 2 does not have.
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time or number >= 1000000:
+            break
+        number *= 10
+    runs = sorted(timer.repeat(repeat, number))
+    return {
+        'number': number,
+        'repeat': repeat,
+        'best_us': runs[0] / number * 1e6,
+        'median_us': runs[len(runs) // 2] / number * 1e6,
+    }
+
+
+def simple_paged_list_benchmarks():
+    superset = list(range(SUPERSET_SIZE))
+    for page_size in PAGE_SIZES:
+        page_number = SUPERSET_SIZE // page_size // 2
+
+        def construct(page_size=page_size, page_number=page_number):
+            list(SimplePagedList(superset, page_number, page_size))
+
+        yield 'SimplePagedList[page_size={0}]'.format(page_size), construct
+
+
+def _sqlite_session():
+    from sqlalchemy import Column
+    from sqlalchemy import Integer
+    from sqlalchemy import String
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    try:
+        from sqlalchemy.orm import declarative_base
+    except ImportError:
+        from sqlalchemy.ext.declarative import declarative_base
+
+    base = declarative_base()
+
+    class Item(base):
+        __tablename__ = 'items'
+        id = Column(Integer, primary_key=True)
+        name = Column(String(50))
+
+    engine = create_engine('sqlite://')
+    base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(
+            Item.__table__.insert(),
+            [{'id': i, 'name': 'item {0}'.format(i)}
+             for i in range(1, SQLITE_ROWS + 1)])
+    return sessionmaker(bind=engine)(), Item
+
+
+def paged_list_benchmarks():
+    try:
+        session, item = _sqlite_session()
+    except ImportError:
+        print("SQLAlchemy is not installed, skipping PagedList.",
+              file=sys.stderr)
+        return
+    query = session.query(item).order_by(item.id)
+    last_page = SQLITE_ROWS // SQLITE_PAGE_SIZE
+    for depth, page_number in (('shallow', 2), ('deep', last_page - 1)):
+        for with_count in (True, False):
+            def construct(page_number=page_number, with_count=with_count):
+                list(PagedList(query, page_number, SQLITE_PAGE_SIZE,
+                               with_count=with_count))
+
+            name = 'PagedList[sqlite,{0},with_count={1}]'.format(
+                depth, with_count)
+            yield name, construct
+
+
+def _ajax(options):
+    return PagedListRenderOptions.enable_unobtrusive_ajax_replacing(
+        options, AjaxOptions(http_method='GET', insertion_mode='replace',
+                             update_target_id='items'))
+
+
+def pager_benchmarks():
+    paged_list = SimplePagedList(range(SUPERSET_SIZE), 500, 20)
+
+    def url(page_number):
+        return '/items?page={0}'.format(page_number)
+
+    for preset in CompiledRenderOptions.presets:
+        for ajax in (False, True):
+            options = getattr(PagedListRenderOptions, preset)()
+            if ajax:
+                options = _ajax(options)
+
+            def render(options=options):
+                Builder.paged_list_pager(paged_list, url, options)
+
+            name = 'Builder.paged_list_pager[{0}{1}]'.format(
+                preset, ',ajax' if ajax else '')
+            yield name, render
+
+            renderer = PagerRenderer(options)
+            name = 'PagerRenderer.render[{0}{1}]'.format(
+                preset, ',ajax' if ajax else '')
+            yield name, lambda renderer=renderer: renderer.render(
+                paged_list, url)
+
+    template = PageUrlTemplate('/items?page={page}')
+    options = PagedListRenderOptions.classic()
+    renderer = PagerRenderer(options)
+    yield ('Builder.paged_list_pager[classic,url_template]',
+           lambda: Builder.paged_list_pager(paged_list, template, options))
+    yield ('PagerRenderer.render[classic,url_template]',
+           lambda: renderer.render(paged_list, template))
+
+
+def _commit():
+    try:
+        output = subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.decode('ascii').strip()
+
+
+def run(selected, repeat, min_time):
+    results = {}
+    for group in (simple_paged_list_benchmarks, paged_list_benchmarks,
+                  pager_benchmarks):
+        for name, fn in group():
+            if selected and not any(s in name for s in selected):
+                continue
+            results[name] = _measure(fn, repeat, min_time)
+            print('{0:<64} {1:>12.2f} us'.format(
+                name, results[name]['best_us']), file=sys.stderr)
+    return {
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """
+    Prints the ratio of every benchmark to the baseline and returns the names
+    of those slower than threshold times the baseline.
+    """
+    regressions = []
+    for name in sorted(report['results']):
+        if name not in baseline['results']:
+            continue
+        ratio = (report['results'][name]['best_us'] /
+                 baseline['results'][name]['best_us'])
+        flag = ''
+        if ratio > threshold:
+            flag = '  SLOWER'
+            regressions.append(name)
+        print('{0:<64} {1:>6.2f}x{2}'.format(name, ratio, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', help="Write the results to this file "
+                        "instead of standard output.")
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help="Compare the results to an earlier output.")
+    parser.add_argument('--threshold', type=float, default=1.1,
+                        help="Ratio to the baseline reported as a "
+                        "regression (default: %(default)s).")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.05,
+                        help="Minimum duration of one run in seconds.")
+    parser.add_argument('only', nargs='*',
+                        help="Only run benchmarks whose name contains one "
+                        "of these strings.")
+    args = parser.parse_args(argv)
+
+    report = run(args.only, args.repeat, args.min_time)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,3 +1,15 @@
-# -*- coding: utf-8 -*-
-
-from .pagedlist import *
+# -*- coding: utf-8 -*-
+import sys
+
+from .pagedlist import *
+from .keyset import KeysetCursor
+from .keyset import KeysetPagedList
+from .cache import CountCache
+from .cache import LRUCache
+from .cache import PageCache
+from .cache import PagerCache
+from .file import FilePagedList
+from .file import LineIndex
+
+if sys.version_info >= (3, 5):
+    from .aio import AsyncPagedList
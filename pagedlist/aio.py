@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+from . import instrumentation
+from .pagedlist import PagedListBase
+
+
+async def _timed(name, awaitable, page_number, page_size, offset=None):
+    # Like instrumentation.timed(), for coroutines.
+    listeners = instrumentation._listeners
+    if not listeners:
+        return await awaitable
+    start = instrumentation._timer()
+    result = await awaitable
+    instrumentation._emit(listeners, name, instrumentation._timer() - start,
+                          result, page_number, page_size, offset)
+    return result
+
+
+class AsyncPagedList(PagedListBase):
+    def __init__(self, query, page_number, page_size, total_item_count,
+                 subset, is_count_known=True):
+        """
+        Use ``await AsyncPagedList.create(...)`` instead, which runs the
+        queries; this constructor only wraps their results.
+        """
+        if is_count_known:
+            super(AsyncPagedList, self).__init__(
+                query, page_number, page_size,
+                total_item_count=total_item_count)
+            self._loaded_subset = subset
+        else:
+            self._peeked_subset = subset
+            super(AsyncPagedList, self).__init__(
+                query, page_number, page_size, with_count=False)
+
+    @classmethod
+    async def create(cls, query, page_number, page_size, count_fn, fetch_fn,
+                     with_count=True):
+        """
+        Initializes a new instance of the AsyncPagedList class without
+        blocking the event loop. The total item count and the subset are
+        queried concurrently, so the latency is that of the slower query
+        rather than the sum of both.
+
+        The two coroutines run at the same time, so they must not share a
+        connection or an ``AsyncSession``, e.g.::
+
+            async def count_fn(stmt):
+                async with Session() as session:
+                    return await session.scalar(
+                        select(func.count()).select_from(stmt.subquery()))
+
+            async def fetch_fn(stmt, limit, offset):
+                async with Session() as session:
+                    result = await session.scalars(
+                        stmt.limit(limit).offset(offset))
+                    return result.all()
+
+        :param query: The query to page through, passed to the callables.
+            None pages through an empty superset.
+        :param page_number: The one-based index of the subset of objects to be
+            contained by the instance.
+        :param page_size: The maximum size of any individual subset.
+        :param count_fn: Coroutine function returning the number of items
+            selected by ``count_fn(query)``.
+        :param fetch_fn: Coroutine function returning the items selected by
+            ``fetch_fn(query, limit, offset)`` as a list.
+        :param with_count: When false, skips count_fn and fetches one extra
+            row to find out whether there is a next page, see PagedList.
+        :raise IndexError:
+        """
+        cls._check_page_arguments(page_number, page_size)
+        offset = (page_number - 1) * page_size
+
+        if query is None:
+            total_item_count, subset = 0, []
+        elif not with_count:
+            total_item_count = None
+            subset = await _timed(
+                instrumentation.FETCH, fetch_fn(query, page_size + 1, offset),
+                page_number, page_size, offset)
+        else:
+            total_item_count, subset = await asyncio.gather(
+                _timed(instrumentation.COUNT, count_fn(query), page_number,
+                       page_size),
+                _timed(instrumentation.FETCH,
+                       fetch_fn(query, page_size, offset), page_number,
+                       page_size, offset))
+
+        return cls(query, page_number, page_size, total_item_count, subset,
+                   is_count_known=total_item_count is not None)
+
+    @classmethod
+    def iter_pages(cls, query, page_size, prefetch=0, **kwargs):
+        raise ValueError(
+            "Pages of an AsyncPagedList are queried by awaiting create() for "
+            "each of them.")
+
+    @classmethod
+    def iter_items(cls, query, page_size, prefetch=0, **kwargs):
+        return cls.iter_pages(query, page_size, prefetch, **kwargs)
+
+    @classmethod
+    def fetch_pages(cls, query, page_numbers, page_size, max_gap=None,
+                    **kwargs):
+        return cls.iter_pages(query, page_size, **kwargs)
+
+    def _load_subset_and_peek(self):
+        subset = self._peeked_subset
+        return subset[:self.page_size], len(subset) > self.page_size
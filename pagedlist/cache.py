@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+import collections
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache(object):
+    def __init__(self, maxsize=128, ttl=None, timer=time.time, weigh=None):
+        """
+        A thread-safe mapping that evicts the least recently used entry once
+        it holds more than maxsize entries, and treats entries older than ttl
+        seconds as missing.
+
+        :param maxsize: The maximum number of entries to keep, or their
+            maximum total weight when weigh is given.
+        :param ttl: The lifetime of an entry in seconds. None keeps entries
+            until they are evicted.
+        :param timer: The clock used to expire entries.
+        :param weigh: Function returning the weight of a value. Every entry
+            weighs 1 by default.
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize cannot be less than 1.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self.weigh = weigh
+        self.hits = 0
+        self.misses = 0
+        self._weight = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._lookup(key) is not None
+
+    @property
+    def hit_rate(self):
+        """
+        Fraction of get() calls answered from the cache.
+
+        :rtype : float
+        """
+        total = self.hits + self.misses
+        return float(self.hits) / total if total else 0.0
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at = entry[1]
+        if expires_at is not None and expires_at <= self.timer():
+            self._remove(key)
+            return None
+        return entry
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._weight -= entry[2]
+        return entry
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            # Move to the most recently used end.
+            del self._entries[key]
+            self._entries[key] = entry
+            return entry[0]
+
+    def set(self, key, value):
+        if self.ttl is None:
+            expires_at = None
+        else:
+            expires_at = self.timer() + self.ttl
+        weight = 1 if self.weigh is None else self.weigh(value)
+        with self._lock:
+            self._remove(key)
+            if weight > self.maxsize:
+                return
+            self._entries[key] = (value, expires_at, weight)
+            self._weight += weight
+            while self._weight > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._remove(key)
+        return default if entry is None else entry[0]
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._weight = 0
+            self.hits = 0
+            self.misses = 0
+
+
+class CountCache(LRUCache):
+    def __init__(self, maxsize=128, ttl=60, timer=time.time, key_fn=None):
+        """
+        Caches the total item count of queries, so that paging through the
+        same superset does not repeat the COUNT query on every page.
+
+        :param maxsize: The maximum number of distinct queries to remember.
+        :param ttl: How many seconds a count stays valid.
+        :param timer: The clock used to expire entries.
+        :param key_fn: Function mapping a query to a hashable fingerprint.
+            Defaults to the compiled SQL and bound parameters of a SQLAlchemy
+            query.
+        """
+        super(CountCache, self).__init__(maxsize, ttl, timer)
+        if key_fn is None:
+            from .sqla import query_fingerprint as key_fn
+        self.key_fn = key_fn
+
+    def get_count(self, query, count_fn):
+        """
+        Returns the cached count of query, calling count_fn(query) on a miss.
+        """
+        key = self.key_fn(query)
+        total_item_count = self.get(key)
+        if total_item_count is None:
+            total_item_count = count_fn(query)
+            self.set(key, total_item_count)
+        return total_item_count
+
+    def invalidate(self, query):
+        """
+        Forgets the cached count of query, e.g. after inserting rows that it
+        selects. Use clear() to forget every count.
+        """
+        self.pop(self.key_fn(query))
+
+
+class PageCache(LRUCache):
+    def __init__(self, maxsize=10000, ttl=60, timer=time.time, key_fn=None,
+                 weigh=None, prefetch=0, executor=None, session_factory=None):
+        """
+        Caches the subsets of paged queries, and optionally fetches the
+        neighbouring pages ahead of time, so paging back and forth does not
+        touch the database. Cached rows are shared by every page built from
+        them, so they must outlive the session that loaded them.
+
+        :param maxsize: The maximum number of rows to keep, or the maximum
+            total weight when weigh is given.
+        :param ttl: How many seconds a page stays valid.
+        :param timer: The clock used to expire entries.
+        :param key_fn: Function mapping a query to a hashable fingerprint, see
+            CountCache.
+        :param weigh: Function returning the weight of a list of rows, e.g.
+            its size in bytes. Defaults to the number of rows.
+        :param prefetch: How many pages before and after a requested page to
+            fetch as well, unless they are cached already.
+        :param executor: The concurrent.futures executor to prefetch on.
+            Without it, the pages are prefetched on the calling thread before
+            the requested one is returned, which is only meant for tests.
+        :param session_factory: Function returning a new SQLAlchemy session
+            to prefetch with on the executor, as a session must not be used
+            by two threads at once. The query is rebound to it with
+            query.with_session(), and it is closed afterwards. Required with
+            executor for queries bound to a session.
+        """
+        if weigh is None:
+            weigh = self._count_rows
+        super(PageCache, self).__init__(maxsize, ttl, timer, weigh)
+        if key_fn is None:
+            from .sqla import query_fingerprint as key_fn
+        self.key_fn = key_fn
+        self.prefetch = prefetch
+        self.executor = executor
+        self.session_factory = session_factory
+
+    @staticmethod
+    def _count_rows(rows):
+        return max(len(rows), 1)
+
+    def get_rows(self, query, limit, offset, fetch_fn, page_size=None):
+        """
+        Returns the cached rows of query in the given window, calling
+        fetch_fn(query, limit, offset) on a miss.
+
+        :param page_size: How far apart the neighbouring pages to prefetch
+            are, when limit also covers rows past the page, e.g. the extra
+            one of PagedList without a count. Defaults to limit.
+        :raise ValueError: if pages are prefetched on the executor for a
+            query bound to a session, but there is no session_factory.
+        """
+        is_prefetched_concurrently = self.prefetch > 0 and \
+            self.executor is not None
+        if is_prefetched_concurrently and self.session_factory is None and \
+                getattr(query, 'session', None) is not None:
+            raise ValueError(
+                "A query bound to a session needs a session_factory to be "
+                "prefetched on the executor, as a session must not be used "
+                "by two threads at once.")
+
+        if page_size is None:
+            page_size = limit
+        fingerprint = self.key_fn(query)
+        rows = self._get_or_fetch(query, fingerprint, limit, offset, fetch_fn)
+        if is_prefetched_concurrently:
+            self.executor.submit(self._prefetch, query, fingerprint, limit,
+                                 page_size, offset, rows, fetch_fn,
+                                 self.session_factory)
+        elif self.prefetch > 0:
+            self._prefetch(query, fingerprint, limit, page_size, offset, rows,
+                           fetch_fn)
+        return rows
+
+    def _get_or_fetch(self, query, fingerprint, limit, offset, fetch_fn):
+        key = (fingerprint, limit, offset)
+        rows = self.get(key)
+        if rows is None:
+            rows = list(fetch_fn(query, limit, offset))
+            self.set(key, rows)
+        return rows
+
+    def _prefetch(self, query, fingerprint, limit, page_size, offset, rows,
+                  fetch_fn, session_factory=None):
+        session = None
+        try:
+            if session_factory is not None:
+                session = session_factory()
+                query = query.with_session(session)
+            # Forwards until a short page, which is the last one.
+            next_offset = offset
+            for _ in range(self.prefetch):
+                if len(rows) < limit:
+                    break
+                next_offset += page_size
+                rows = self._peek_or_fetch(query, fingerprint, limit,
+                                           next_offset, fetch_fn)
+            for i in range(1, self.prefetch + 1):
+                if offset - i * page_size < 0:
+                    break
+                self._peek_or_fetch(query, fingerprint, limit,
+                                    offset - i * page_size, fetch_fn)
+        except Exception:
+            # The requested page is served already, prefetching is a bonus.
+            logger.exception("Failed to prefetch pages.")
+        finally:
+            if session is not None:
+                session.close()
+
+    def _peek_or_fetch(self, query, fingerprint, limit, offset, fetch_fn):
+        # Like _get_or_fetch(), but without counting hits and misses.
+        key = (fingerprint, limit, offset)
+        with self._lock:
+            entry = self._lookup(key)
+        if entry is not None:
+            return entry[0]
+        rows = list(fetch_fn(query, limit, offset))
+        self.set(key, rows)
+        return rows
+
+    def invalidate(self, query):
+        """
+        Forgets every cached page of query. Use clear() to forget all pages.
+        """
+        fingerprint = self.key_fn(query)
+        for key in self.keys():
+            if key[0] == fingerprint:
+                self.pop(key)
+
+
+class PagerCache(LRUCache):
+    #: Stored for pagers that are not displayed, as None means a miss.
+    _not_displayed = object()
+
+    def __init__(self, maxsize=1024, ttl=None, timer=time.time):
+        """
+        Caches rendered pagers, which only depend on the position of the page
+        in the superset, the render options and the URLs of the pages, so
+        popular list pages reuse the markup instead of rendering it again.
+
+        :param maxsize: The maximum number of pagers to keep.
+        :param ttl: How many seconds a pager stays valid. None keeps pagers
+            until they are evicted.
+        :param timer: The clock used to expire entries.
+        """
+        super(PagerCache, self).__init__(maxsize, ttl, timer)
+
+    @staticmethod
+    def key(paged_list, options, url_key):
+        return (paged_list.page_number, paged_list.page_size,
+                paged_list.page_count, paged_list.total_item_count,
+                paged_list.first_item_on_page, paged_list.last_item_on_page,
+                paged_list.has_next_page, paged_list.is_estimated_count,
+                options.fingerprint(), url_key)
+
+    def get_pager(self, paged_list, options, url_key, render_fn):
+        """
+        Returns the cached pager of paged_list, calling render_fn() on a miss.
+
+        :param url_key: A hashable standing for the URLs of the pages, e.g.
+            the name of the route and its arguments other than the page.
+        """
+        key = self.key(paged_list, options, url_key)
+        markup = self.get(key)
+        if markup is None:
+            markup = render_fn()
+            self.set(key, self._not_displayed if markup is None else markup)
+        elif markup is self._not_displayed:
+            markup = None
+        return markup
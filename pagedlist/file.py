@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+import array
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+from .pagedlist import PagedListBase
+
+_replace = getattr(os, 'replace', os.rename)
+
+
+class LineIndex(object):
+    #: Magic, indexed file size, line count, inode of the file and CRC-32 of
+    #: its head, followed by the offsets as little-endian unsigned 64-bit
+    #: integers.
+    _header = struct.Struct('<8sQQQI')
+    _magic = b'PLIDX\x00\x00\x02'
+    #: Number of bytes at the start of the file covered by the checksum.
+    _head_size = 4096
+
+    def __init__(self, path, index_path=None):
+        """
+        The start offsets of the lines of a file, persisted next to it so
+        that any line can be read without scanning the file. Only complete
+        lines, i.e. ending with a newline, are indexed. Requires Python 3.3
+        or later for the 64-bit offsets.
+
+        :param path: The line-delimited file to index.
+        :param index_path: Where to persist the index, defaults to the path
+            of the file plus ".idx".
+        """
+        self.path = path
+        self.index_path = index_path or path + '.idx'
+        self.offsets = array.array('Q')
+        #: Number of bytes of the file covered by the index.
+        self.indexed_size = 0
+        self._inode = 0
+        self._head_checksum = 0
+        self._load()
+        self.update()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _load(self):
+        try:
+            with open(self.index_path, 'rb') as f:
+                magic, indexed_size, line_count, inode, head_checksum = \
+                    self._header.unpack(f.read(self._header.size))
+                if magic != self._magic:
+                    return
+                offsets = array.array('Q')
+                offsets.fromfile(f, line_count)
+        except (IOError, OSError, EOFError, struct.error):
+            return
+        if sys.byteorder == 'big':
+            offsets.byteswap()
+        self.offsets = offsets
+        self.indexed_size = indexed_size
+        self._inode = inode
+        self._head_checksum = head_checksum
+
+    def save(self):
+        """
+        Persists the index, replacing the previous one atomically. Failures
+        are ignored, e.g. for files in read-only directories.
+        """
+        offsets = self.offsets
+        if sys.byteorder == 'big':
+            offsets = array.array('Q', offsets)
+            offsets.byteswap()
+        temp_path = '%s.%d.tmp' % (self.index_path, os.getpid())
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(self._header.pack(
+                    self._magic, self.indexed_size, len(offsets),
+                    self._inode, self._head_checksum))
+                offsets.tofile(f)
+            _replace(temp_path, self.index_path)
+        except (IOError, OSError):
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _read_head_checksum(self, f):
+        f.seek(0)
+        head = f.read(min(self.indexed_size, self._head_size))
+        return zlib.crc32(head) & 0xffffffff
+
+    def _is_stale(self, f, stat):
+        # Files replaced by another one have another inode. Truncated or
+        # rewritten files most likely no longer end a line where the index
+        # stops, or start with the same bytes.
+        if stat.st_size < self.indexed_size:
+            return True
+        if self.indexed_size == 0:
+            return False
+        if stat.st_ino != self._inode:
+            return True
+        f.seek(self.indexed_size - 1)
+        if f.read(1) != b'\n':
+            return True
+        return self._read_head_checksum(f) != self._head_checksum
+
+    def update(self):
+        """
+        Indexes the lines appended to the file since the last update, or
+        rebuilds the index if the file was truncated or rewritten.
+
+        :return: True if the index changed.
+        :rtype : bool
+        """
+        with open(self.path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            size = stat.st_size
+            if self._is_stale(f, stat):
+                self.offsets = array.array('Q')
+                self.indexed_size = 0
+            if size == self.indexed_size:
+                return False
+
+            position = self.indexed_size
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                find = mapped.find
+                append = self.offsets.append
+                end = find(b'\n', position)
+                while end >= 0:
+                    append(position)
+                    position = end + 1
+                    end = find(b'\n', position)
+            finally:
+                mapped.close()
+
+            if position == self.indexed_size:
+                return False
+            self.indexed_size = position
+            self._inode = stat.st_ino
+            self._head_checksum = self._read_head_checksum(f)
+        self.save()
+        return True
+
+    def read_lines(self, start, stop):
+        """
+        Returns the lines with zero-based indexes start to stop - 1, without
+        their newlines.
+
+        :rtype : list of bytes
+        """
+        stop = min(stop, len(self.offsets))
+        if start >= stop:
+            return []
+        begin = self.offsets[start]
+        if stop < len(self.offsets):
+            end = self.offsets[stop]
+        else:
+            end = self.indexed_size
+        with open(self.path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                chunk = mapped[begin:end]
+            finally:
+                mapped.close()
+        return chunk.split(b'\n')[:-1]
+
+
+class FilePagedList(PagedListBase):
+    def __init__(self, path, page_number, page_size, decode=None,
+                 total_item_count=None):
+        """
+        Initializes a new instance of the FilePagedList class, which pages
+        through the lines of a line-delimited file, e.g. JSONL or CSV, by
+        slicing a memory map at offsets from a LineIndex. Opening a deep page
+        costs the same as opening the first one.
+
+        :param path: The path of the file, or a LineIndex of it to reuse
+            between pages. Either way, lines appended since the index was last
+            updated are indexed first.
+        :param page_number: The one-based index of the subset of lines to be
+            contained by this instance.
+        :param page_size: The maximum size of any individual subset.
+        :param decode: An optional function applied to every line, which are
+            bytes without their newline otherwise, e.g. json.loads.
+        :param total_item_count: The total item count if it is already known.
+        :raise IndexError:
+        """
+        if isinstance(path, LineIndex):
+            index = path
+            index.update()
+        else:
+            index = LineIndex(path)
+        self._decode = decode
+        super(FilePagedList, self).__init__(
+            index, page_number, page_size, total_item_count=total_item_count)
+
+    @classmethod
+    def fetch_pages(cls, query, page_numbers, page_size, max_gap=None,
+                    **kwargs):
+        if not isinstance(query, LineIndex):
+            query = LineIndex(query)
+        return super(FilePagedList, cls).fetch_pages(
+            query, page_numbers, page_size, max_gap, **kwargs)
+
+    @classmethod
+    def _generate_pages(cls, query, page_size, kwargs):
+        if not isinstance(query, LineIndex):
+            query = LineIndex(query)
+        return super(FilePagedList, cls)._generate_pages(
+            query, page_size, kwargs)
+
+    def _query_count_fn(self, query):
+        return len(query)
+
+    def _query_limit_offset_fn(self, query, limit, offset):
+        lines = query.read_lines(offset, offset + limit)
+        if self._decode is not None:
+            lines = [self._decode(line) for line in lines]
+        return lines
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import logging
+import time
+
+#: The total item count was queried; row_count is the count.
+COUNT = 'count'
+#: A subset was queried; row_count is the number of rows returned. With
+#: PagedList's window_count, the total item count is selected by the same
+#: query and no COUNT is emitted.
+FETCH = 'fetch'
+#: Builder.paged_list_pager() rendered a pager; size is its length.
+RENDER_PAGER = 'render_pager'
+#: Builder.paged_list_goto_page_form() rendered a form; size is its length.
+RENDER_GOTO_PAGE_FORM = 'render_goto_page_form'
+
+_timer = getattr(time, 'perf_counter', time.time)
+
+# Replaced rather than mutated, so emitting never needs a lock.
+_listeners = ()
+
+
+class Event(object):
+    __slots__ = ['name', 'duration', 'page_number', 'page_size', 'offset',
+                 'row_count', 'size']
+
+    def __init__(self, name, duration, page_number=None, page_size=None,
+                 offset=None, row_count=None, size=None):
+        """
+        Timing of one paging operation, passed to every listener.
+
+        :param name: One of COUNT, FETCH, RENDER_PAGER or
+            RENDER_GOTO_PAGE_FORM.
+        :param duration: Wall clock time of the operation in seconds.
+        :param page_number: The page the operation was for.
+        :param page_size: The page size the operation was for.
+        :param offset: The offset of the fetched rows, for FETCH.
+        :param row_count: The number of rows counted or fetched.
+        :param size: The length of the rendered markup.
+        """
+        self.name = name
+        self.duration = duration
+        self.page_number = page_number
+        self.page_size = page_size
+        self.offset = offset
+        self.row_count = row_count
+        self.size = size
+
+    def __repr__(self):
+        return '<Event %s %.6fs page=%r size=%r offset=%r rows=%r>' % (
+            self.name, self.duration, self.page_number, self.page_size,
+            self.offset, self.row_count)
+
+
+def add_listener(listener):
+    """
+    Registers a function to be called with an Event after every count,
+    fetch and render. Without listeners, nothing is timed.
+    """
+    global _listeners
+    _listeners = _listeners + (listener,)
+
+
+def remove_listener(listener):
+    global _listeners
+    _listeners = tuple(
+        registered for registered in _listeners if registered is not listener)
+
+
+@contextlib.contextmanager
+def listening(listener):
+    """
+    Registers listener for the duration of a with block.
+    """
+    add_listener(listener)
+    try:
+        yield listener
+    finally:
+        remove_listener(listener)
+
+
+def timed(name, fn, args, page_number=None, page_size=None, offset=None):
+    """
+    Returns fn(*args), emitting an Event named name to the listeners if
+    there are any.
+    """
+    listeners = _listeners
+    if not listeners:
+        return fn(*args)
+
+    start = _timer()
+    result = fn(*args)
+    _emit(listeners, name, _timer() - start, result, page_number, page_size,
+          offset)
+    return result
+
+
+def _emit(listeners, name, duration, result, page_number, page_size,
+          offset):
+    row_count = size = None
+    if name == COUNT:
+        row_count = result
+    elif name == FETCH:
+        row_count = len(result)
+    elif result is not None:
+        size = len(result)
+    event = Event(name, duration, page_number, page_size, offset, row_count,
+                  size)
+    for listener in listeners:
+        listener(event)
+
+
+class SlowPageLogger(object):
+    def __init__(self, threshold=1.0, logger=None, level=logging.WARNING):
+        """
+        A listener logging counts and fetches slower than threshold seconds,
+        which usually are deep pages of large supersets.
+
+        :param threshold: The duration in seconds from which to log.
+        :param logger: The logger to log to, defaults to this module's.
+        :param level: The level to log at.
+        """
+        self.threshold = threshold
+        self.logger = logger or logging.getLogger(__name__)
+        self.level = level
+
+    def __call__(self, event):
+        if event.name not in (COUNT, FETCH) or \
+                event.duration < self.threshold:
+            return
+        self.logger.log(
+            self.level,
+            "Slow %s took %.3fs for page %s (page_size=%s, offset=%s, "
+            "rows=%s).", event.name, event.duration, event.page_number,
+            event.page_size, event.offset, event.row_count)
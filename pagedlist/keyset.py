@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+import base64
+import datetime
+import decimal
+import json
+import uuid
+
+import six
+
+from .pagedlist import PagedList
+
+
+class _FixedOffset(datetime.tzinfo):
+    # Stands in for datetime.timezone, which Python 2 does not have.
+
+    def __init__(self, offset):
+        self._offset = offset
+
+    def utcoffset(self, dt):
+        return self._offset
+
+    def dst(self, dt):
+        return datetime.timedelta(0)
+
+    def tzname(self, dt):
+        return None
+
+
+_timezone = getattr(datetime, 'timezone', _FixedOffset)
+
+
+def _encode_value(value):
+    # JSON cannot represent these key types, so they are tagged with a
+    # single-key object, which no key value is otherwise.
+    if isinstance(value, datetime.datetime):
+        offset = value.utcoffset()
+        if offset is not None:
+            offset = offset.days * 86400 + offset.seconds
+        return {'$datetime': [value.year, value.month, value.day,
+                              value.hour, value.minute, value.second,
+                              value.microsecond, offset]}
+    if isinstance(value, datetime.date):
+        return {'$date': [value.year, value.month, value.day]}
+    if isinstance(value, datetime.time):
+        return {'$time': [value.hour, value.minute, value.second,
+                          value.microsecond]}
+    if isinstance(value, decimal.Decimal):
+        return {'$decimal': str(value)}
+    if isinstance(value, uuid.UUID):
+        return {'$uuid': str(value)}
+    if isinstance(value, bytes) and not isinstance(value, str):
+        return {'$bytes': base64.b64encode(value).decode('ascii')}
+    return value
+
+
+def _decode_value(value):
+    if not isinstance(value, dict):
+        return value
+    if len(value) != 1:
+        raise ValueError("Unknown keyset cursor value: %r" % (value,))
+    tag, data = next(iter(value.items()))
+    if tag == '$datetime':
+        offset = data[7]
+        tzinfo = None
+        if offset is not None:
+            tzinfo = _timezone(datetime.timedelta(seconds=offset))
+        return datetime.datetime(*data[:7], tzinfo=tzinfo)
+    if tag == '$date':
+        return datetime.date(*data)
+    if tag == '$time':
+        return datetime.time(*data)
+    if tag == '$decimal':
+        return decimal.Decimal(data)
+    if tag == '$uuid':
+        return uuid.UUID(data)
+    if tag == '$bytes':
+        return base64.b64decode(data.encode('ascii'))
+    raise ValueError("Unknown keyset cursor value: %r" % (value,))
+
+
+class KeysetCursor(object):
+    __slots__ = ['page_number', 'direction', 'values']
+
+    #: Rows strictly after ``values`` in sort order.
+    Next = 'n'
+    #: Rows strictly before ``values`` in sort order.
+    Previous = 'p'
+    #: The tail of the result set, read backwards from the end.
+    Last = 'l'
+
+    def __init__(self, page_number, direction=None, values=None):
+        """
+        Position of a page within a keyset paged superset.
+
+        :param page_number: The one-based index of the page this cursor
+            points at.
+        :param direction: One of Next, Previous or Last, None for the first
+            page.
+        :param values: The sort key values of the row bordering the page.
+        """
+        self.page_number = page_number
+        self.direction = direction
+        self.values = values
+
+    def encode(self):
+        """
+        Serializes this cursor to an opaque, URL-safe token. Besides the
+        JSON types, key values may be datetimes, dates, times, Decimals,
+        UUIDs and bytes.
+
+        :rtype : str
+        :raise TypeError: if a key value has any other type.
+        """
+        values = self.values
+        if values is not None:
+            values = [_encode_value(value) for value in values]
+        payload = json.dumps([self.page_number, self.direction, values],
+                             separators=(',', ':'))
+        token = base64.urlsafe_b64encode(payload.encode('utf-8'))
+        return token.decode('ascii').rstrip('=')
+
+    @classmethod
+    def decode(cls, token):
+        """
+        Parses a token previously returned by encode().
+
+        :raise ValueError: if the token is malformed.
+        """
+        if not token:
+            return cls(1)
+        token = str(token)
+        try:
+            payload = base64.urlsafe_b64decode(
+                (token + '=' * (-len(token) % 4)).encode('ascii'))
+            page_number, direction, values = json.loads(
+                payload.decode('utf-8'))
+            if values is not None:
+                values = [_decode_value(value) for value in values]
+        except (TypeError, ValueError, AttributeError, IndexError,
+                UnicodeError, decimal.InvalidOperation):
+            raise ValueError("Malformed keyset cursor: %r" % token)
+        if not isinstance(page_number, six.integer_types) or \
+                page_number < 1 or \
+                direction not in (None, cls.Next, cls.Previous, cls.Last) or \
+                (direction is None and page_number != 1):
+            raise ValueError("Malformed keyset cursor: %r" % token)
+        return cls(page_number, direction, values)
+
+
+class KeysetPagedList(PagedList):
+    def __init__(self, query, cursor, page_size, keys, key_fn=None,
+                 count_cache=None, with_count=True, total_item_count=None):
+        """
+        Initializes a new instance of the KeysetPagedList class, which pages
+        through a SQLAlchemy query with ``WHERE (keys) > (last seen)``
+        predicates instead of OFFSET, so deep pages cost the same as the
+        first one.
+
+        Pages can only be reached relative to the current one, see
+        cursor_for_page().
+
+        :param query: The SQLAlchemy query to page through. Its ORDER BY is
+            replaced by ``keys``.
+        :param cursor: The opaque token of the page to load, as returned by
+            cursor_for_page(), next_cursor or previous_cursor. None loads the
+            first page.
+        :param page_size: The maximum size of any individual subset.
+        :param keys: Column expressions that totally order the rows, usually
+            ending with the primary key. Wrap a column in
+            ``sqlalchemy.desc()`` to sort it descending.
+        :param key_fn: Function mapping a row to the tuple of its key values.
+            Defaults to reading each key's attribute from the row.
+        :param count_cache: An optional CountCache, see PagedList.
+        :param with_count: When false, skips the COUNT query, see PagedList.
+            The last page is then only reachable by walking forward.
+        :param total_item_count: The total item count if it is already known,
+            which skips the COUNT query.
+        :raise IndexError:
+        :raise ValueError: if the cursor is malformed.
+        """
+        if not keys:
+            raise ValueError("keys cannot be empty.")
+        self._keys = [self._unwrap_key(key) for key in keys]
+        self._key_fn = key_fn
+        self._cursor = KeysetCursor.decode(cursor)
+        super(KeysetPagedList, self).__init__(
+            query, self._cursor.page_number, page_size,
+            count_cache=count_cache, with_count=with_count,
+            total_item_count=total_item_count)
+        if self.page_count is not None and \
+                self.page_number > max(self.page_count, 1):
+            self._clamp_page_number(max(self.page_count, 1))
+
+    def _clamp_page_number(self, page_number):
+        # The page number of a cursor is not trusted, as it may be stale or
+        # edited by hand, so it cannot lie past the last page.
+        self._cursor.page_number = page_number
+        self._page_number = page_number
+        self._has_previous_page = page_number > 1
+        self._is_first_page = page_number == 1
+        self._first_item_on_page = (page_number - 1) * self.page_size + 1
+        self._paginate(self.total_item_count)
+
+    @staticmethod
+    def _unwrap_key(key):
+        from sqlalchemy.sql import operators
+
+        modifier = getattr(key, 'modifier', None)
+        if modifier is operators.desc_op:
+            return key.element, True
+        if modifier is operators.asc_op:
+            return key.element, False
+        return key, False
+
+    def _key_values(self, row):
+        if self._key_fn:
+            return list(self._key_fn(row))
+        return [getattr(row, column.key) for column, _ in self._keys]
+
+    def _seek_predicate(self, values, forward):
+        from sqlalchemy import and_
+        from sqlalchemy import or_
+
+        # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y), expanded so it
+        # works on backends without row value comparison and with mixed
+        # sort directions.
+        clauses = []
+        for i, (column, descending) in enumerate(self._keys):
+            equal = [self._keys[j][0] == values[j] for j in range(i)]
+            if forward != descending:
+                equal.append(column > values[i])
+            else:
+                equal.append(column < values[i])
+            clauses.append(and_(*equal))
+        return or_(*clauses)
+
+    def _ordering(self, forward):
+        return [column.desc() if forward == descending else column.asc()
+                for column, descending in self._keys]
+
+    def _query_limit_offset_fn(self, query, limit, offset):
+        cursor = self._cursor
+        forward = cursor.direction not in (KeysetCursor.Previous,
+                                           KeysetCursor.Last)
+        query = query.order_by(None).order_by(*self._ordering(forward))
+        if cursor.direction == KeysetCursor.Last:
+            limit = self.total_item_count - self.first_item_on_page + 1
+            limit = max(1, min(limit, self.page_size))
+        elif cursor.direction is not None:
+            if len(cursor.values or ()) != len(self._keys):
+                raise ValueError("Keyset cursor does not match keys.")
+            query = query.filter(self._seek_predicate(cursor.values, forward))
+
+        rows = query.limit(limit).all()
+        if not forward:
+            rows.reverse()
+        return rows
+
+    @classmethod
+    def fetch_pages(cls, query, page_numbers, page_size, max_gap=None,
+                    **kwargs):
+        raise ValueError(
+            "fetch_pages() needs page numbers, but keyset pages can only be "
+            "reached one after another.")
+
+    @classmethod
+    def _generate_pages(cls, query, page_size, kwargs):
+        # Walks the next cursors, so iter_pages() needs the keys argument.
+        page = cls(query, None, page_size, **kwargs)
+        kwargs['total_item_count'] = page.total_item_count
+        while len(page) > 0:
+            yield page
+            if page.is_last_page:
+                break
+            page = cls(query, page.next_cursor, page_size, **kwargs)
+
+    def _load_subset_and_peek(self):
+        if self._cursor.direction not in (KeysetCursor.Previous,
+                                          KeysetCursor.Last):
+            return super(KeysetPagedList, self)._load_subset_and_peek()
+        if self._cursor.direction == KeysetCursor.Last:
+            raise ValueError("The last page cursor needs a total count.")
+        # Reading backwards, the extra row lies before the page, and the page
+        # we came from is the next one.
+        rows = self._timed_fetch(self._query, self.page_size + 1, None)
+        return rows[-self.page_size:], True
+
+    def cursor_for_page(self, page_number):
+        """
+        Returns the cursor of the given page, which must be the first, the
+        last, or a neighbour of the current page. Returns None for the first
+        page.
+
+        :raise IndexError: if the page cannot be reached from this one.
+        """
+        if page_number == 1:
+            return None
+        if page_number == self.page_number:
+            return self._cursor.encode()
+        if page_number == self.page_number + 1 and self._subset:
+            return KeysetCursor(page_number, KeysetCursor.Next,
+                                self._key_values(self._subset[-1])).encode()
+        if page_number == self.page_number - 1 and self._subset:
+            return KeysetCursor(page_number, KeysetCursor.Previous,
+                                self._key_values(self._subset[0])).encode()
+        if page_number == self.page_count:
+            return KeysetCursor(page_number, KeysetCursor.Last).encode()
+        raise IndexError(
+            "page %d is not reachable from page %d." % (page_number,
+                                                        self.page_number))
+
+    @property
+    def next_cursor(self):
+        """
+        Cursor of the next page, or None if this is the last page.
+        """
+        if not self.has_next_page or not self._subset:
+            return None
+        return self.cursor_for_page(self.page_number + 1)
+
+    @property
+    def previous_cursor(self):
+        """
+        Cursor of the previous page. Like any cursor of the first page, it
+        is None when the previous page is the first one, so check
+        has_previous_page to tell the cases apart.
+        """
+        if not self.has_previous_page or not self._subset:
+            return None
+        return self.cursor_for_page(self.page_number - 1)
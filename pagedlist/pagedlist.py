@@ -1,16 +1,72 @@
 # -*- coding: utf-8 -*-
 import abc
+import collections
+import itertools
 import math
+import struct
+import threading
 
 import six
+from six.moves import queue
+
+from . import instrumentation
+
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
+
+
+def _prefetch(iterable, depth):
+    # Drains iterable on a background thread into a queue of at most depth
+    # entries, re-raising its errors on the consuming side.
+    entries = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+    done = object()
+
+    def put(entry):
+        while not stopped.is_set():
+            try:
+                entries.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except BaseException as e:
+            put((None, e))
+        else:
+            put((done, None))
+
+    thread = threading.Thread(target=produce)
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            item, error = entries.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        stopped.set()
 
 
 @six.add_metaclass(abc.ABCMeta)
 class IPagedList(object):
+    __slots__ = ()
+
     @abc.abstractproperty
     def page_count(self):
         """
-        Total number of subsets within the superset.
+        Total number of subsets within the superset, or None when the
+        superset was not counted.
 
         :rtype : int
         """
@@ -18,7 +74,8 @@ class IPagedList(object):
     @abc.abstractproperty
     def total_item_count(self):
         """
-        Total number of objects contained within the superset.
+        Total number of objects contained within the superset, or None when
+        the superset was not counted.
 
         :rtype : int
         """
@@ -87,24 +144,132 @@ class IPagedList(object):
         :return: int
         """
 
+    @property
+    def is_estimated_count(self):
+        """
+        Returns true if total_item_count, and everything derived from it, is
+        an estimate rather than an exact count.
+
+        :rtype : bool
+        """
+        return False
+
 
 class PagedListMetaData(IPagedList):
+    __slots__ = ['_page_number', '_page_size', '_total_item_count',
+                 '_page_count', '_last_item_on_page', '_has_next_page',
+                 '_is_estimated_count']
+
+    #: Version, page number, page size, total item count, page count, last
+    #: item on page and flags. Unknown counts are stored as -1.
+    _struct = struct.Struct('!BqqqqqB')
+    _version = 1
+    _has_next_page_flag = 1
+    _is_estimated_count_flag = 2
+
     def __init__(self, paged_list):
         """
-        Non-enumerable version of the PagedList class.
+        Non-enumerable version of the PagedList class. Only the values that
+        cannot be derived from the others are stored, which keeps instances
+        small and cheap to serialize.
 
         :type paged_list: IPagedList
         """
-        self._page_count = paged_list.page_count
-        self._total_item_count = paged_list.total_item_count
         self._page_number = paged_list.page_number
         self._page_size = paged_list.page_size
-        self._has_previous_page = paged_list.has_previous_page
-        self._has_next_page = paged_list.has_next_page
-        self._is_first_page = paged_list.is_first_page
-        self._is_last_page = paged_list.is_last_page
-        self._first_item_on_page = paged_list.first_item_on_page
+        self._total_item_count = paged_list.total_item_count
+        self._page_count = paged_list.page_count
         self._last_item_on_page = paged_list.last_item_on_page
+        self._has_next_page = paged_list.has_next_page
+        self._is_estimated_count = paged_list.is_estimated_count
+
+    @classmethod
+    def _from_fields(cls, page_number, page_size, total_item_count,
+                     page_count, last_item_on_page, has_next_page,
+                     is_estimated_count):
+        metadata = cls.__new__(cls)
+        metadata._page_number = page_number
+        metadata._page_size = page_size
+        metadata._total_item_count = total_item_count
+        metadata._page_count = page_count
+        metadata._last_item_on_page = last_item_on_page
+        metadata._has_next_page = has_next_page
+        metadata._is_estimated_count = is_estimated_count
+        return metadata
+
+    def to_bytes(self):
+        """
+        Serializes this instance to a fixed size binary record.
+
+        :rtype : bytes
+        """
+        flags = 0
+        if self._has_next_page:
+            flags |= self._has_next_page_flag
+        if self._is_estimated_count:
+            flags |= self._is_estimated_count_flag
+        return self._struct.pack(
+            self._version, self._page_number, self._page_size,
+            -1 if self._total_item_count is None else self._total_item_count,
+            -1 if self._page_count is None else self._page_count,
+            self._last_item_on_page, flags)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Parses a record returned by to_bytes().
+
+        :raise ValueError: if data is not such a record.
+        """
+        try:
+            (version, page_number, page_size, total_item_count, page_count,
+             last_item_on_page, flags) = cls._struct.unpack(data)
+        except struct.error as e:
+            raise ValueError(str(e))
+        if version != cls._version:
+            raise ValueError("Unsupported PagedListMetaData version: %d" %
+                             version)
+        return cls._from_fields(
+            page_number, page_size,
+            None if total_item_count < 0 else total_item_count,
+            None if page_count < 0 else page_count,
+            last_item_on_page,
+            bool(flags & cls._has_next_page_flag),
+            bool(flags & cls._is_estimated_count_flag))
+
+    def to_dict(self):
+        """
+        Returns every paging property of this instance as a dict, e.g. for
+        JSON serialization.
+
+        :rtype : dict
+        """
+        return {
+            'page_count': self.page_count,
+            'total_item_count': self.total_item_count,
+            'page_number': self.page_number,
+            'page_size': self.page_size,
+            'has_previous_page': self.has_previous_page,
+            'has_next_page': self.has_next_page,
+            'is_first_page': self.is_first_page,
+            'is_last_page': self.is_last_page,
+            'first_item_on_page': self.first_item_on_page,
+            'last_item_on_page': self.last_item_on_page,
+            'is_estimated_count': self.is_estimated_count,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Builds an instance from a dict returned by to_dict().
+        """
+        return cls._from_fields(
+            data['page_number'], data['page_size'], data['total_item_count'],
+            data['page_count'], data['last_item_on_page'],
+            data['has_next_page'], data.get('is_estimated_count', False))
+
+    def __reduce__(self):
+        return self.__class__.from_bytes, (self.to_bytes(),)
 
     @property
     def page_number(self):
@@ -112,7 +277,7 @@ class PagedListMetaData(IPagedList):
 
     @property
     def is_first_page(self):
-        return self._is_first_page
+        return self._page_number == 1
 
     @property
     def page_size(self):
@@ -120,11 +285,11 @@ class PagedListMetaData(IPagedList):
 
     @property
     def has_previous_page(self):
-        return self.has_previous_page
+        return self._page_number > 1
 
     @property
     def first_item_on_page(self):
-        return self._first_item_on_page
+        return (self._page_number - 1) * self._page_size + 1
 
     @property
     def has_next_page(self):
@@ -144,11 +309,64 @@ class PagedListMetaData(IPagedList):
 
     @property
     def is_last_page(self):
-        return self._is_last_page
+        return not self._has_next_page
+
+    @property
+    def is_estimated_count(self):
+        return self._is_estimated_count
 
 
 class PagedListBase(IPagedList):
-    def __init__(self, query, page_number, page_size):
+    def __init__(self, query, page_number, page_size, with_count=True,
+                 total_item_count=None, executor=None, timeout=None):
+        self._check_page_arguments(page_number, page_size)
+
+        self._page_size = page_size
+        self._page_number = page_number
+        self._has_previous_page = page_number > 1
+        self._is_first_page = page_number == 1
+        self._first_item_on_page = (page_number - 1) * page_size + 1
+        self._is_estimated_count = False
+
+        # The subset is only queried once the items are first accessed, so
+        # metadata-only callers never pay for it.
+        self._query = query
+        self._loaded_subset = None
+
+        if total_item_count is not None:
+            # Counted by the caller, e.g. once for many pages.
+            self._paginate(total_item_count)
+        elif with_count:
+            if query is None:
+                total_item_count = 0
+            elif executor is not None:
+                total_item_count = self._count_concurrently(
+                    query, executor, timeout)
+            else:
+                total_item_count = self._timed_count(query)
+            self._paginate(total_item_count)
+        else:
+            self._paginate_without_count()
+
+    def _count_concurrently(self, query, executor, timeout):
+        # Count on the executor while fetching the subset on this thread.
+        future = executor.submit(
+            instrumentation.timed, instrumentation.COUNT,
+            self._concurrent_count_fn, (query,), self.page_number,
+            self.page_size)
+        try:
+            self._loaded_subset = self._timed_fetch(
+                query, self.page_size, (self.page_number - 1) * self.page_size)
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def _concurrent_count_fn(self, query):
+        return self._query_count_fn(query)
+
+    @staticmethod
+    def _check_page_arguments(page_number, page_size):
         assert isinstance(page_number, six.integer_types)
         assert isinstance(page_size, six.integer_types)
 
@@ -157,45 +375,194 @@ class PagedListBase(IPagedList):
         if page_size < 1:
             raise IndexError("page_size cannot be less than 1.")
 
-        if not query:
-            self._total_item_count = 0
-        else:
-            self._total_item_count = self._query_count_fn(query)
-        self._page_size = page_size
-        self._page_number = page_number
-        if self.total_item_count > 0:
-            self._page_count = int(math.ceil(self.total_item_count /
-                                             float(page_size)))
+    def _paginate(self, total_item_count):
+        self._total_item_count = total_item_count
+        if total_item_count > 0:
+            self._page_count = int(math.ceil(total_item_count /
+                                             float(self.page_size)))
         else:
             self._page_count = 0
-        self._has_previous_page = page_number > 1
-        self._has_next_page = page_number < self.page_count
-        self._is_first_page = page_number == 1
-        self._is_last_page = page_number >= self.page_count
-        self._first_item_on_page = (page_number - 1) * page_size + 1
-        number_of_last_item_on_page = self.first_item_on_page + page_size - 1
-        if number_of_last_item_on_page > self.total_item_count:
-            self._last_item_on_page = self.total_item_count
+        self._has_next_page = self.page_number < self.page_count
+        self._is_last_page = self.page_number >= self.page_count
+        number_of_last_item_on_page = \
+            self.first_item_on_page + self.page_size - 1
+        if number_of_last_item_on_page > total_item_count:
+            self._last_item_on_page = total_item_count
         else:
             self._last_item_on_page = number_of_last_item_on_page
 
+    def _paginate_without_count(self):
+        # The total is left unknown; one row past the end of the page is
+        # fetched instead to find out whether there is a next page.
+        self._total_item_count = None
+        self._page_count = None
+        subset, has_next_page = self._load_subset_and_peek()
+        self._loaded_subset = subset
+        self._has_next_page = has_next_page
+        self._is_last_page = not has_next_page
+        self._last_item_on_page = self.first_item_on_page + len(subset) - 1
+
+    def _load_subset_and_peek(self):
+        query = self._query
+        if query is None:
+            return [], False
+        rows = self._timed_fetch(
+            query, self.page_size + 1, (self.page_number - 1) * self.page_size)
+        return rows[:self.page_size], len(rows) > self.page_size
+
+    @property
+    def _subset(self):
+        if self._loaded_subset is None:
+            self._loaded_subset = self._load_subset()
+        return self._loaded_subset
+
+    def _load_subset(self):
         # Query subset of all items, based on current page
-        if query and self.total_item_count > 0:
-            if page_number == 1:
-                self._subset = self._query_limit_offset_fn(query, page_size, 0)
-            else:
-                self._subset = self._query_limit_offset_fn(
-                    query, page_size, (page_number - 1) * page_size)
-        else:
-            self._subset = []
+        query = self._query
+        if query is not None and self.total_item_count > 0:
+            if self.page_number == 1:
+                return self._timed_fetch(query, self.page_size, 0)
+            return self._timed_fetch(
+                query, self.page_size, (self.page_number - 1) * self.page_size)
+        return []
 
     def _query_count_fn(self, query):
         return 0
 
+    def _timed_count(self, query):
+        return instrumentation.timed(
+            instrumentation.COUNT, self._query_count_fn, (query,),
+            self.page_number, self.page_size)
+
+    def _timed_fetch(self, query, limit, offset):
+        return instrumentation.timed(
+            instrumentation.FETCH, self._query_limit_offset_fn,
+            (query, limit, offset), self.page_number, self.page_size, offset)
+
     def _query_limit_offset_fn(self, query, limit, offset):
         return []
 
+    @classmethod
+    def iter_pages(cls, query, page_size, prefetch=0, **kwargs):
+        """
+        Yields every non-empty page of the superset in order, counting it
+        only once.
+
+        :param query: The superset to page through.
+        :param page_size: The maximum size of any individual subset.
+        :param prefetch: When above zero, the pages are fetched by a
+            background thread, which keeps up to this many pages ready ahead
+            of the caller. The query must then not be used elsewhere, e.g.
+            its SQLAlchemy session, until the iteration is over.
+        :param kwargs: Passed to the constructor of every page.
+        """
+        pages = cls._generate_pages(query, page_size, kwargs)
+        if prefetch > 0:
+            pages = _prefetch(pages, prefetch)
+        return pages
+
+    @classmethod
+    def iter_items(cls, query, page_size, prefetch=0, **kwargs):
+        """
+        Yields every item of the superset, fetching it one page at a time.
+        See iter_pages().
+        """
+        for page in cls.iter_pages(query, page_size, prefetch, **kwargs):
+            for item in page:
+                yield item
+
+    @classmethod
+    def fetch_pages(cls, query, page_numbers, page_size, max_gap=None,
+                    **kwargs):
+        """
+        Returns an instance for each of the given page numbers, in the same
+        order, counting the superset once and fetching all their subsets
+        with a single limit/offset query over the range covering them.
+
+        :param query: The superset to page through.
+        :param page_numbers: The one-based indexes of the pages to fetch.
+        :param page_size: The maximum size of any individual subset.
+        :param max_gap: When given, pages more than this many pages apart are
+            fetched by separate range queries instead of also fetching every
+            page in between.
+        :param kwargs: Passed to the constructor of every page. The superset
+            must be counted.
+        :raise IndexError:
+        :raise ValueError: If the superset is not counted.
+        """
+        if not kwargs.get('with_count', True):
+            raise ValueError("fetch_pages() needs a total item count.")
+        page_numbers = list(page_numbers)
+        for page_number in page_numbers:
+            cls._check_page_arguments(page_number, page_size)
+        if not page_numbers:
+            return []
+
+        # Options that fetch the subset along with the count would fetch the
+        # first page twice.
+        count_kwargs = dict(kwargs)
+        for name in ('executor', 'timeout', 'window_count'):
+            count_kwargs.pop(name, None)
+        first = cls(query, page_numbers[0], page_size, **count_kwargs)
+        if first.total_item_count is None:
+            raise ValueError("fetch_pages() needs a total item count.")
+        kwargs['total_item_count'] = first.total_item_count
+        pages = [first] + [cls(query, page_number, page_size, **kwargs)
+                           for page_number in page_numbers[1:]]
+        for page in pages:
+            page._is_estimated_count = first.is_estimated_count
+
+        # Group the pages that exist into runs fetched by one query each.
+        # Pages past an estimated total may exist as well.
+        wanted = sorted(set(page.page_number for page in pages
+                            if first.is_estimated_count or
+                            page.first_item_on_page <=
+                            page.total_item_count))
+        runs = []
+        for page_number in wanted:
+            if runs and (max_gap is None or
+                         page_number - runs[-1][-1] - 1 <= max_gap):
+                runs[-1].append(page_number)
+            else:
+                runs.append([page_number])
+
+        subsets = {}
+        for run in runs:
+            offset = (run[0] - 1) * page_size
+            rows = first._timed_fetch(
+                query, (run[-1] - run[0] + 1) * page_size, offset)
+            for page_number in run:
+                start = (page_number - 1) * page_size - offset
+                subsets[page_number] = rows[start:start + page_size]
+
+        for page in pages:
+            page._loaded_subset = subsets.get(page.page_number, [])
+        return pages
+
+    @classmethod
+    def _generate_pages(cls, query, page_size, kwargs):
+        page = cls(query, 1, page_size, **kwargs)
+        is_estimated_count = page.is_estimated_count
+        kwargs['total_item_count'] = page.total_item_count
+        # len() loads the subset, on the background thread when prefetching.
+        while len(page) > 0:
+            yield page
+            if is_estimated_count:
+                # The last page of an estimate may not be the last one.
+                if len(page) < page_size:
+                    break
+            elif page.is_last_page:
+                break
+            page = cls(query, page.page_number + 1, page_size, **kwargs)
+            page._is_estimated_count = is_estimated_count
+
     def metadata(self):
+        """
+        Returns the paging information of this instance without querying its
+        subset.
+
+        :rtype : PagedListMetaData
+        """
         return PagedListMetaData(self)
 
     @property
@@ -238,6 +605,10 @@ class PagedListBase(IPagedList):
     def is_last_page(self):
         return self._is_last_page
 
+    @property
+    def is_estimated_count(self):
+        return self._is_estimated_count
+
     def __len__(self):
         return len(self._subset)
 
@@ -256,22 +627,218 @@ class PagedListBase(IPagedList):
             yield item
 
     def index(self, value):
-        return self._subset.index(value)
+        subset = self._subset
+        if hasattr(subset, 'index'):
+            return subset.index(value)
+        # Buffers and arrays do not implement the sequence methods.
+        for i, item in enumerate(subset):
+            if item == value:
+                return i
+        raise ValueError("%r is not in subset" % (value,))
 
     def count(self, value):
-        return self._subset.count(value)
+        subset = self._subset
+        if hasattr(subset, 'count'):
+            return subset.count(value)
+        return sum(1 for item in subset if item == value)
+
+
+class SequenceView(Sequence):
+    __slots__ = ['_sequence', '_start', '_stop']
+
+    def __init__(self, sequence, start, stop):
+        """
+        Read-only view of sequence[start:stop] that does not copy the items.
+        Changes to the sequence show through the view.
+        """
+        self._sequence = sequence
+        self._start = start
+        self._stop = max(start, min(stop, len(sequence)))
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step == 1:
+                return SequenceView(self._sequence, self._start + start,
+                                    self._start + max(start, stop))
+            return [self[j] for j in range(start, stop, step)]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("SequenceView index out of range")
+        return self._sequence[self._start + i]
+
+    def __iter__(self):
+        sequence = self._sequence
+        for i in range(self._start, self._stop):
+            yield sequence[i]
+
+    def __repr__(self):
+        return 'SequenceView(%r)' % (list(self),)
 
 
 class SimplePagedList(PagedListBase):
+    def __init__(self, query, page_number, page_size, with_count=True,
+                 total_item_count=None, executor=None, timeout=None,
+                 view=False):
+        """
+        Initializes a new instance of the SimplePagedList class, which pages
+        through an in-memory sequence.
+
+        :param query: The sequence to page through.
+        :param page_number: The one-based index of the subset of objects to be
+            contained by this instance.
+        :param page_size: The maximum size of any individual subset.
+        :param with_count: When false, the length of the sequence is not
+            reported, see PagedList.
+        :param total_item_count: The length of the sequence if it is already
+            known.
+        :param executor: See PagedListBase.
+        :param timeout: See PagedListBase.
+        :param view: When true, the subset is a view instead of a copy: a
+            memoryview for objects supporting the buffer protocol such as
+            bytes and array.array, a NumPy view for NumPy arrays, and a
+            SequenceView for any other sequence.
+        :raise IndexError:
+        """
+        self._view = view
+        super(SimplePagedList, self).__init__(
+            query, page_number, page_size, with_count=with_count,
+            total_item_count=total_item_count, executor=executor,
+            timeout=timeout)
+
     def _query_limit_offset_fn(self, query, limit, offset):
+        if self._view:
+            return self._view_of(query, offset, offset + limit)
         return query[offset:offset + limit]
 
+    @staticmethod
+    def _view_of(query, start, stop):
+        # Slicing a NumPy array already returns a view.
+        if hasattr(query, '__array_interface__'):
+            return query[start:stop]
+        try:
+            buffer_view = memoryview(query)
+        except TypeError:
+            return SequenceView(query, start, stop)
+        return buffer_view[start:stop]
+
     def _query_count_fn(self, query):
         return len(query)
 
 
+class SharedIterator(object):
+    def __init__(self, iterable):
+        """
+        Wraps an iterator so that consecutive IteratorPagedList pages can
+        read it one after another, each skipping only the items between the
+        previous page and its own.
+
+        :param iterable: The iterable to share.
+        """
+        self._iterator = iter(iterable)
+        self._lookahead = collections.deque()
+        #: Zero-based index of the next item the iterator yields.
+        self.position = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._lookahead:
+            item = self._lookahead.popleft()
+        else:
+            item = next(self._iterator)
+        self.position += 1
+        return item
+
+    next = __next__
+
+    def peek(self):
+        """
+        Returns true if the iterator has more items, without consuming them.
+        """
+        if not self._lookahead:
+            for item in itertools.islice(self._iterator, 1):
+                self._lookahead.append(item)
+        return bool(self._lookahead)
+
+    def take(self, offset, limit):
+        """
+        Skips ahead to offset and returns the next limit items as a list.
+
+        :raise IndexError: if offset lies before the current position, since
+            an iterator cannot be rewound.
+        """
+        if offset < self.position:
+            raise IndexError("cannot rewind to %d, already at %d." %
+                             (offset, self.position))
+        for _ in itertools.islice(self, offset - self.position):
+            pass
+        return list(itertools.islice(self, limit))
+
+
+class IteratorPagedList(PagedListBase):
+    def __init__(self, iterable, page_number, page_size, count_fn=None,
+                 total_item_count=None):
+        """
+        Initializes a new instance of the IteratorPagedList class, which
+        pages through any iterable, e.g. a generator or a database cursor,
+        without materializing more than one page of it.
+
+        The iterable is consumed on first access to the items. Wrap it in a
+        SharedIterator to build consecutive pages from the same iterator.
+
+        :param iterable: The superset to page through.
+        :param page_number: The one-based index of the subset of objects to be
+            contained by this instance.
+        :param page_size: The maximum size of any individual subset.
+        :param count_fn: An optional function without arguments returning the
+            total item count. Without it, the total item count and page count
+            are None and one extra item is read to find out whether there is
+            a next page.
+        :param total_item_count: The total item count if it is already known.
+        :raise IndexError:
+        """
+        self._count_fn = count_fn
+        super(IteratorPagedList, self).__init__(
+            iterable, page_number, page_size, with_count=count_fn is not None,
+            total_item_count=total_item_count)
+
+    @classmethod
+    def _generate_pages(cls, query, page_size, kwargs):
+        if not isinstance(query, SharedIterator):
+            query = SharedIterator(query)
+        return super(IteratorPagedList, cls)._generate_pages(
+            query, page_size, kwargs)
+
+    def _query_count_fn(self, query):
+        return self._count_fn()
+
+    def _query_limit_offset_fn(self, query, limit, offset):
+        if isinstance(query, SharedIterator):
+            return query.take(offset, limit)
+        return list(itertools.islice(query, offset, offset + limit))
+
+    def _load_subset_and_peek(self):
+        query = self._query
+        if not isinstance(query, SharedIterator):
+            return super(IteratorPagedList, self)._load_subset_and_peek()
+        # Peeking keeps the extra item available for the next page.
+        subset = self._timed_fetch(
+            query, self.page_size, (self.page_number - 1) * self.page_size)
+        return subset, query.peek()
+
+
 class PagedList(PagedListBase):
-    def __init__(self, query, page_number, page_size):
+    def __init__(self, query, page_number, page_size, count_cache=None,
+                 with_count=True, count_estimator=None,
+                 exact_count_threshold=100000, executor=None, timeout=None,
+                 session_factory=None, total_item_count=None,
+                 page_cache=None, window_count=False, count_fn=None):
         """
         Initializes a new instance of the PagedList class that divides the
         supplied superset into subsets the size of the supplied pageSize.
@@ -285,12 +852,126 @@ class PagedList(PagedListBase):
         :param page_number: The one-based index of the subset of objects to be
             contained by this instance.
         :param page_size: The maximum size of any individual subset.
+        :param count_cache: An optional CountCache to look the total item
+            count up in before running the COUNT query.
+        :param with_count: When false, skips the COUNT query and fetches one
+            extra row to find out whether there is a next page instead. The
+            total item count and page count are then None.
+        :param count_estimator: An optional function returning a cheap
+            estimate of query.count(), or None if it cannot tell, e.g.
+            pagedlist.sqla.postgresql_planner_estimate.
+        :param exact_count_threshold: Estimates below this value are replaced
+            by an exact count, so small supersets are always counted exactly.
+        :param executor: An optional concurrent.futures executor. When given,
+            the count runs on it while the subset is fetched on the calling
+            thread, instead of one after the other.
+        :param timeout: The maximum number of seconds to wait for the count
+            on the executor.
+        :param session_factory: Function returning a new SQLAlchemy session
+            for the count on the executor, as a session must not be used by
+            two threads at once. The session is closed afterwards. Required
+            with executor for queries bound to a session.
+        :param total_item_count: The total item count if it is already known,
+            which skips the COUNT query.
+        :param page_cache: An optional PageCache to look the subset up in
+            before running the limit/offset query.
+        :param window_count: When true, the total item count is selected
+            along with the subset as ``COUNT(*) OVER ()``, so both take a
+            single round trip. The COUNT query only runs when the page is
+            empty or the query does not select a single entity, or is
+            DISTINCT. Requires a SQLAlchemy ORM query and a database
+            supporting window functions, and cannot be combined with
+            count_estimator or page_cache.
+        :param count_fn: An optional function counting the rows of query
+            instead of query.count(), e.g.
+            pagedlist.sqla.optimized_count.
         :raise IndexError:
+        :raise ValueError: if window_count is combined with count_estimator
+            or page_cache, or executor is given without session_factory for
+            a query bound to a session.
+        :raise concurrent.futures.TimeoutError: if the count on the executor
+            took longer than timeout.
         """
-        super(PagedList, self).__init__(query, page_number, page_size)
+        if window_count and (count_estimator is not None or
+                             page_cache is not None):
+            raise ValueError(
+                "window_count counts every row along with the page, so it "
+                "cannot be combined with count_estimator or page_cache.")
+        if executor is not None and session_factory is None and \
+                getattr(query, 'session', None) is not None:
+            raise ValueError(
+                "A query bound to a session needs a session_factory to be "
+                "counted on the executor, as a session must not be used by "
+                "two threads at once.")
+        self._count_cache = count_cache
+        self._count_estimator = count_estimator
+        self._exact_count_threshold = exact_count_threshold
+        self._session_factory = session_factory
+        self._page_cache = page_cache
+        self._count_fn = count_fn
+
+        subset = None
+        if window_count and with_count and total_item_count is None and \
+                query is not None:
+            from .sqla import fetch_with_window_count
+
+            self._check_page_arguments(page_number, page_size)
+            totals = []
+
+            def fetch(query, limit, offset):
+                rows, total = fetch_with_window_count(query, limit, offset)
+                totals.append(total)
+                return rows
+
+            offset = (page_number - 1) * page_size
+            subset = instrumentation.timed(
+                instrumentation.FETCH, fetch, (query, page_size, offset),
+                page_number, page_size, offset)
+            total_item_count = totals[0]
+            if total_item_count is not None and count_cache is not None:
+                count_cache.set(count_cache.key_fn(query), total_item_count)
+
+        super(PagedList, self).__init__(query, page_number, page_size,
+                                        with_count=with_count,
+                                        total_item_count=total_item_count,
+                                        executor=executor, timeout=timeout)
+        if subset is not None:
+            self._loaded_subset = subset
 
     def _query_count_fn(self, query):
+        if self._count_estimator is not None:
+            estimate = self._count_estimator(query)
+            if estimate is not None and \
+                    estimate >= self._exact_count_threshold:
+                self._is_estimated_count = True
+                return int(estimate)
+        if self._count_cache is not None:
+            return self._count_cache.get_count(query, self._count)
+        return self._count(query)
+
+    def _count(self, query):
+        if self._count_fn is not None:
+            return self._count_fn(query)
         return query.count()
 
+    def _concurrent_count_fn(self, query):
+        if self._session_factory is None:
+            return self._query_count_fn(query)
+        session = self._session_factory()
+        try:
+            return self._query_count_fn(query.with_session(session))
+        finally:
+            session.close()
+
     def _query_limit_offset_fn(self, query, limit, offset):
+        if self._page_cache is not None:
+            # Without a count, every page is fetched with one extra row.
+            page_size = self.page_size if self.total_item_count is None \
+                else limit
+            return self._page_cache.get_rows(query, limit, offset,
+                                             self._fetch, page_size)
+        return self._fetch(query, limit, offset)
+
+    @staticmethod
+    def _fetch(query, limit, offset):
         return query.limit(limit).offset(offset).all()
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+import json
+
+import six
+
+
+def query_fingerprint(query):
+    """
+    Returns a hashable key identifying the rows selected by a SQLAlchemy
+    query or statement: its compiled SQL plus the bound parameters.
+    """
+    statement = getattr(query, 'statement', query)
+    compiled = statement.compile()
+    params = sorted((name, repr(value))
+                    for name, value in compiled.params.items())
+    return str(compiled), tuple(params)
+
+
+_ExplainJson = None
+
+
+def _explain_json(statement):
+    # Compiled by the dialect when executed, so that bound parameters, e.g.
+    # the expanding ones of IN, are rendered as for the statement itself.
+    # Defined on first use, as SQLAlchemy is optional.
+    global _ExplainJson
+    if _ExplainJson is None:
+        from sqlalchemy.ext.compiler import compiles
+        from sqlalchemy.sql.expression import ClauseElement
+        from sqlalchemy.sql.expression import Executable
+
+        class ExplainJson(Executable, ClauseElement):
+            inherit_cache = False
+
+            def __init__(self, statement):
+                self.statement = statement
+
+        @compiles(ExplainJson)
+        def compile_explain_json(element, compiler, **kw):
+            return 'EXPLAIN (FORMAT JSON) ' + compiler.process(
+                element.statement, **kw)
+
+        _ExplainJson = ExplainJson
+    return _ExplainJson(statement)
+
+
+def postgresql_planner_estimate(query):
+    """
+    Returns the number of rows the PostgreSQL planner expects a SQLAlchemy
+    ORM query to return, read from ``EXPLAIN (FORMAT JSON)`` without running
+    the query. Returns None on other databases, or if the EXPLAIN fails, so
+    that the query is counted exactly instead.
+
+    Meant to be passed as PagedList's count_estimator. Planner estimates are
+    only as good as the table statistics, so keep exact_count_threshold high
+    enough that small results are counted exactly.
+    """
+    from sqlalchemy.exc import DBAPIError
+
+    session = query.session
+    if session.get_bind().dialect.name != 'postgresql':
+        return None
+    # A failed statement aborts the whole transaction on PostgreSQL.
+    savepoint = session.begin_nested()
+    try:
+        plan = session.execute(_explain_json(query.statement)).scalar()
+    except DBAPIError:
+        savepoint.rollback()
+        return None
+    savepoint.commit()
+    if isinstance(plan, six.string_types):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def _is_single_entity(query):
+    descriptions = query.column_descriptions
+    return len(descriptions) == 1 and \
+        descriptions[0]['entity'] is not None and \
+        descriptions[0]['expr'] is descriptions[0]['entity']
+
+
+def fetch_with_window_count(query, limit, offset):
+    """
+    Runs a page of a single-entity SQLAlchemy ORM query with
+    ``COUNT(*) OVER ()`` added to its columns, returning the entities and the
+    total row count of the query in a single round trip.
+
+    Other queries are run as they are, so that their rows keep the shape
+    query.all() gives them, and a DISTINCT is applied after the window
+    function, so neither gets a count.
+
+    :return: The rows, and the total, or None when the page is empty or the
+        query cannot be counted this way.
+    """
+    from sqlalchemy import func
+
+    if getattr(query.statement, '_distinct', False) or \
+            not _is_single_entity(query):
+        return query.limit(limit).offset(offset).all(), None
+
+    rows = query.add_columns(func.count().over().label('pagedlist_total')) \
+        .limit(limit).offset(offset).all()
+    if not rows:
+        return [], None
+    return [row[0] for row in rows], rows[0][-1]
+
+
+def _has_limit_or_offset(statement):
+    # Names differ between SQLAlchemy versions.
+    for name in ('_limit_clause', '_offset_clause', '_limit', '_offset'):
+        if getattr(statement, name, None) is not None:
+            return True
+    return False
+
+
+def _is_plain_select(statement):
+    from sqlalchemy.sql import Select
+
+    if not isinstance(statement, Select) or _has_limit_or_offset(statement):
+        return False
+    # Names differ between SQLAlchemy versions.
+    if getattr(statement, '_having', None) is not None:
+        return False
+    for name in ('_group_by_clauses', '_group_by_clause', '_having_criteria',
+                 '_distinct_on'):
+        clauses = getattr(statement, name, None)
+        if clauses is not None and len(clauses):
+            return False
+    return True
+
+
+def optimized_count(query):
+    """
+    Counts the rows of a SQLAlchemy ORM query like query.count(), without
+    wrapping the full query in a subquery: ORDER BY and eager-load joins are
+    dropped, and a single-entity query counts its primary key directly
+    (distinct values of it for DISTINCT queries). Explicit joins are kept,
+    as they may change the number of rows.
+
+    Queries that cannot be counted that way, e.g. with GROUP BY, LIMIT or
+    several entities, fall back to query.count() on the query stripped of
+    its ORDER BY and eager loads. With LIMIT or OFFSET, the ORDER BY picks
+    the rows counted, so such queries are counted unchanged.
+
+    Meant to be passed as PagedList's count_fn.
+    """
+    from sqlalchemy import distinct
+    from sqlalchemy import func
+    from sqlalchemy import inspect
+
+    if _has_limit_or_offset(query.statement):
+        return query.count()
+    query = query.order_by(None).enable_eagerloads(False)
+    if not _is_single_entity(query):
+        return query.count()
+    entity = query.column_descriptions[0]['entity']
+    mapper = inspect(entity).mapper
+    statement = query.statement
+    # Single table inheritance criteria hang off the entity, not its columns.
+    if mapper.single or not _is_plain_select(statement):
+        return query.count()
+
+    primary_key = [getattr(entity, mapper.get_property_by_column(column).key)
+                   for column in mapper.primary_key]
+    if getattr(statement, '_distinct', False):
+        if len(primary_key) != 1:
+            return query.count()
+        column = func.count(distinct(primary_key[0]))
+    else:
+        column = func.count(primary_key[0])
+    return query.with_entities(column).scalar()
@@ -2,9 +2,12 @@
 import genshi
 from genshi.builder import tag
 
+from .. import instrumentation
+from . import layout as layout_kinds
+from .layout import pager_layout
 from .options import GoToFormRenderOptions
-from .options import PagedListDisplayMode
 from .options import PagedListRenderOptions
+from .urls import PageUrlTemplate
 
 
 class Builder(object):
@@ -101,19 +104,49 @@ class Builder(object):
         last(href=page_url_generator(target_page_number))
         return cls._wrap_in_list_item(last, options, 'PagedList-skipToLast')
 
+    @classmethod
+    def _approximate_count(cls, count):
+        for divisor, suffix in ((10 ** 9, 'B'), (10 ** 6, 'M'), (10 ** 3, 'K')):
+            if count >= divisor:
+                value = float(count) / divisor
+                if value < 10:
+                    return '{0:.1f}'.format(value).replace('.0', '') + suffix
+                return '{0:.0f}'.format(value) + suffix
+        return str(count)
+
+    @classmethod
+    def _page_count_and_location_string(cls, paged_list, options):
+        if paged_list.is_estimated_count:
+            format_func = options.function_to_display_approximate_count or \
+                cls._approximate_count
+            return options.approximate_page_count_and_current_location_format\
+                .format(paged_list.page_number,
+                        format_func(paged_list.page_count))
+        return options.page_count_and_current_location_format.format(
+            paged_list.page_number, paged_list.page_count)
+
     @classmethod
     def _page_count_and_location_text(cls, paged_list, options):
-        text = tag.a(options.page_count_and_current_location_format.format(
-            paged_list.page_number, paged_list.page_count))
+        text = tag.a(cls._page_count_and_location_string(paged_list, options))
 
         return cls._wrap_in_list_item(
             text, options, 'PagedList-pageCountAndLocation', 'disabled')
 
     @classmethod
-    def _item_slice_and_total_text(cls, paged_list, options):
-        text = tag.a(options.item_slice_and_total_format.format(
+    def _item_slice_and_total_string(cls, paged_list, options):
+        if paged_list.is_estimated_count:
+            format_func = options.function_to_display_approximate_count or \
+                cls._approximate_count
+            return options.approximate_item_slice_and_total_format.format(
+                paged_list.first_item_on_page, paged_list.last_item_on_page,
+                format_func(paged_list.total_item_count))
+        return options.item_slice_and_total_format.format(
             paged_list.first_item_on_page, paged_list.last_item_on_page,
-            paged_list.total_item_count))
+            paged_list.total_item_count)
+
+    @classmethod
+    def _item_slice_and_total_text(cls, paged_list, options):
+        text = tag.a(cls._item_slice_and_total_string(paged_list, options))
 
         return cls._wrap_in_list_item(
             text, options, 'PagedList-pageCountAndLocation', 'disabled')
@@ -126,106 +159,77 @@ class Builder(object):
             a, options, 'PagedList-ellipses', 'disabled')
 
     @classmethod
-    def paged_list_pager(cls, paged_list, page_url_generator, options=None):
-        """Displays a configurable paging control for instances of PagedList."""
+    def paged_list_pager(cls, paged_list, page_url_generator, options=None,
+                         cache=None, url_key=None):
+        """
+        Displays a configurable paging control for instances of PagedList.
+
+        :param page_url_generator: Function returning the URL of a page given
+            its number, or a PageUrlTemplate, or a template string or
+            (prefix, suffix) tuple to build one from.
+        :param cache: An optional PagerCache to reuse rendered pagers from.
+        :param url_key: A hashable standing for the URLs page_url_generator
+            returns, to key cached pagers by, e.g. the name of the route and
+            its arguments other than the page. Defaults to the template when
+            page_url_generator is one, but is required for functions, whose
+            URLs usually depend on the request as well.
+        :raise ValueError: If cache is given with a function but no url_key.
+        """
         if options is None:
             options = PagedListRenderOptions()
+        page_url_generator = PageUrlTemplate.coerce(page_url_generator)
+        if cache is not None:
+            if url_key is None:
+                if not isinstance(page_url_generator, PageUrlTemplate):
+                    raise ValueError(
+                        "Caching the pager of a page URL function needs a "
+                        "url_key for the URLs it returns.")
+                url_key = page_url_generator
+            return instrumentation.timed(
+                instrumentation.RENDER_PAGER, cache.get_pager,
+                (paged_list, options, url_key,
+                 lambda: cls._paged_list_pager(
+                     paged_list, page_url_generator, options)),
+                paged_list.page_number, paged_list.page_size)
+        return instrumentation.timed(
+            instrumentation.RENDER_PAGER, cls._paged_list_pager,
+            (paged_list, page_url_generator, options),
+            paged_list.page_number, paged_list.page_size)
 
-        if options.display == PagedListDisplayMode.Never or \
-                (options.display == PagedListDisplayMode.IfNeeded and
-                 paged_list.page_count <= 1):
+    @classmethod
+    def _paged_list_pager(cls, paged_list, page_url_generator, options):
+        layout = pager_layout(paged_list, options)
+        if layout is None:
             return None
 
         list_item_links = []
-
-        # Calculate start and end of range of page numbers
-        first_page_to_display = 1
-        last_page_to_display = paged_list.page_count
-        page_numbers_to_display = last_page_to_display
-
-        if options.maximum_page_numbers_to_display is not None and \
-                paged_list.page_count > options.maximum_page_numbers_to_display:
-            # Cannot fit all pages into pager
-            max_page_numbers_to_display = \
-                options.maximum_page_numbers_to_display
-            first_page_to_display = \
-                paged_list.page_number - max_page_numbers_to_display / 2
-            if first_page_to_display < 1:
-                first_page_to_display = 1
-
-            page_numbers_to_display = max_page_numbers_to_display
-            last_page_to_display = \
-                first_page_to_display + page_numbers_to_display - 1
-            if last_page_to_display > paged_list.page_count:
-                first_page_to_display = \
-                    paged_list.page_count - max_page_numbers_to_display + 1
-
-        # First
-        if (options.display_link_to_first_page == PagedListDisplayMode.Always or
-                (options.display_link_to_first_page ==
-                 PagedListDisplayMode.IfNeeded and first_page_to_display > 1)):
-            list_item_links.append(
-                cls._first(paged_list, page_url_generator, options))
-
-        # Previous
-        if (options.display_link_to_previous_page ==
-                PagedListDisplayMode.Always or
-                (options.display_link_to_previous_page ==
-                 PagedListDisplayMode.IfNeeded and
-                 not paged_list.is_first_page)):
-            list_item_links.append(
-                cls._previous(paged_list, page_url_generator, options))
-
-        # Text
-        if options.display_page_count_and_current_location:
-            list_item_links.append(
-                cls._page_count_and_location_text(paged_list, options))
-
-        # Text
-        if options.display_item_slice_and_total:
-            list_item_links.append(
-                cls._item_slice_and_total_text(paged_list, options))
-
-        # Page
-        if options.display_link_to_individual_pages:
-            # If there are previous page numbers not displayed, show an ellipsis
-            if options.display_ellipses_when_not_showing_all_page_numbers and \
-                    first_page_to_display > 1:
-                list_item_links.append(cls._ellipses(options))
-
-            for i in range(first_page_to_display,
-                           first_page_to_display + page_numbers_to_display):
-                # Show delimiter between page numbers
-                if i > first_page_to_display and \
-                        options.delimiter_between_page_numbers:
-                    list_item_links.append(cls._wrap_text_in_list_item(
-                        options.delimiter_between_page_numbers))
-
-                # Show page number link
+        for kind, page_number in layout:
+            if kind == layout_kinds.PAGE:
+                list_item_links.append(cls._page(
+                    page_number, paged_list, page_url_generator, options))
+            elif kind == layout_kinds.DELIMITER:
+                list_item_links.append(cls._wrap_text_in_list_item(
+                    options.delimiter_between_page_numbers))
+            elif kind == layout_kinds.FIRST:
                 list_item_links.append(
-                    cls._page(i, paged_list, page_url_generator, options))
-
-            # If there are subsequent page numbers not displayed, show ellipsis
-            if options.display_ellipses_when_not_showing_all_page_numbers and \
-                    ((first_page_to_display + page_numbers_to_display - 1) <
-                     paged_list.page_count):
+                    cls._first(paged_list, page_url_generator, options))
+            elif kind == layout_kinds.PREVIOUS:
+                list_item_links.append(
+                    cls._previous(paged_list, page_url_generator, options))
+            elif kind == layout_kinds.NEXT:
+                list_item_links.append(
+                    cls._next(paged_list, page_url_generator, options))
+            elif kind == layout_kinds.LAST:
+                list_item_links.append(
+                    cls._last(paged_list, page_url_generator, options))
+            elif kind == layout_kinds.ELLIPSES:
                 list_item_links.append(cls._ellipses(options))
-
-        # Next
-        if options.display_link_to_next_page == PagedListDisplayMode.Always or \
-                (options.display_link_to_next_page ==
-                 PagedListDisplayMode.IfNeeded and
-                 not paged_list.is_last_page):
-            list_item_links.append(
-                cls._next(paged_list, page_url_generator, options))
-
-        # Last
-        if options.display_link_to_last_page == PagedListDisplayMode.Always or \
-                (options.display_link_to_last_page ==
-                 PagedListDisplayMode.IfNeeded and
-                 last_page_to_display < paged_list.page_count):
-            list_item_links.append(
-                cls._last(paged_list, page_url_generator, options))
+            elif kind == layout_kinds.PAGE_COUNT_AND_LOCATION:
+                list_item_links.append(
+                    cls._page_count_and_location_text(paged_list, options))
+            elif kind == layout_kinds.ITEM_SLICE_AND_TOTAL:
+                list_item_links.append(
+                    cls._item_slice_and_total_text(paged_list, options))
 
         if list_item_links:
             # Append class to first item in list?
@@ -259,6 +263,58 @@ class Builder(object):
 
         return outer_div.generate().render()
 
+    @classmethod
+    def paged_list_pager_model(cls, paged_list, page_url_generator,
+                               options=None):
+        """
+        Describes the links of the paging control paged_list_pager() would
+        render as plain data, e.g. to serialize to JSON for clients that
+        render the pager themselves. Delimiters between page numbers and all
+        text are left to the client.
+
+        :return: A list of dicts with the page number a link points to (None
+            for ellipses, text and disabled links to the first, previous,
+            next or last page), its kind, whether it is disabled or the
+            current page, and its href, which is None if it is either. None if
+            no paging control is displayed.
+        :rtype : list of dict
+        """
+        if options is None:
+            options = PagedListRenderOptions()
+        layout = pager_layout(paged_list, options)
+        if layout is None:
+            return None
+        page_url_generator = PageUrlTemplate.coerce(page_url_generator)
+
+        links = []
+        for kind, page_number in layout:
+            active = False
+            if kind == layout_kinds.PAGE:
+                active = page_number == paged_list.page_number
+                disabled = False
+            elif kind == layout_kinds.FIRST:
+                disabled = paged_list.is_first_page
+            elif kind == layout_kinds.PREVIOUS:
+                disabled = not paged_list.has_previous_page
+            elif kind == layout_kinds.NEXT:
+                disabled = not paged_list.has_next_page
+            elif kind == layout_kinds.LAST:
+                disabled = paged_list.is_last_page
+            elif kind == layout_kinds.DELIMITER:
+                continue
+            else:
+                disabled = True
+            if disabled:
+                # E.g. the previous page of the first page, which is 0.
+                page_number = None
+            href = None
+            if not (disabled or active):
+                href = page_url_generator(page_number)
+            links.append({'page': page_number, 'kind': kind,
+                          'disabled': disabled, 'active': active,
+                          'href': href})
+        return links
+
     @classmethod
     def paged_list_goto_page_form(cls, paged_list, form_action,
                                   options=None):
@@ -266,6 +322,14 @@ class Builder(object):
         Displays a configurable "Go To Page:" form for instances of
         PagedList.
         """
+        return instrumentation.timed(
+            instrumentation.RENDER_GOTO_PAGE_FORM,
+            cls._paged_list_goto_page_form,
+            (paged_list, form_action, options),
+            paged_list.page_number, paged_list.page_size)
+
+    @classmethod
+    def _paged_list_goto_page_form(cls, paged_list, form_action, options):
         if not options:
             options = GoToFormRenderOptions()
 
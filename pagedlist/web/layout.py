@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+from .options import PagedListDisplayMode
+
+# The kinds of items in a pager, in the order they are displayed.
+FIRST = 'first'
+PREVIOUS = 'previous'
+PAGE_COUNT_AND_LOCATION = 'page_count_and_location'
+ITEM_SLICE_AND_TOTAL = 'item_slice_and_total'
+ELLIPSES = 'ellipses'
+DELIMITER = 'delimiter'
+PAGE = 'page'
+NEXT = 'next'
+LAST = 'last'
+
+#: The most page numbers a pager displays around the current page, even if
+#: maximum_page_numbers_to_display is None or larger, so that pagers of
+#: huge lists stay small.
+HARD_MAXIMUM_PAGE_NUMBERS_TO_DISPLAY = 1000
+
+
+def _is_displayed(mode, if_needed):
+    return mode == PagedListDisplayMode.Always or \
+        (mode == PagedListDisplayMode.IfNeeded and if_needed)
+
+
+def page_window(paged_list, options):
+    """
+    Returns the first page number and the number of page numbers to display
+    for the individual page links.
+
+    :rtype : tuple
+    """
+    max_page_numbers_to_display = options.maximum_page_numbers_to_display
+    if max_page_numbers_to_display is None or \
+            max_page_numbers_to_display > HARD_MAXIMUM_PAGE_NUMBERS_TO_DISPLAY:
+        max_page_numbers_to_display = HARD_MAXIMUM_PAGE_NUMBERS_TO_DISPLAY
+    if paged_list.page_count <= max_page_numbers_to_display:
+        return 1, paged_list.page_count
+
+    # Cannot fit all pages into pager
+    first_page_to_display = \
+        paged_list.page_number - max_page_numbers_to_display // 2
+    if first_page_to_display < 1:
+        first_page_to_display = 1
+    if first_page_to_display + max_page_numbers_to_display - 1 > \
+            paged_list.page_count:
+        first_page_to_display = \
+            paged_list.page_count - max_page_numbers_to_display + 1
+    return first_page_to_display, max_page_numbers_to_display
+
+
+def page_numbers(paged_list, options):
+    """
+    Returns the sorted page numbers to display individual links to: the
+    window around the current page and, if enabled, the logarithmic jumps
+    before and after it.
+
+    :rtype : list of int
+    """
+    first_page_to_display, page_numbers_to_display = \
+        page_window(paged_list, options)
+    last_page_to_display = first_page_to_display + page_numbers_to_display - 1
+    numbers = list(range(first_page_to_display, last_page_to_display + 1))
+    if not options.display_logarithmic_jumps or not numbers:
+        return numbers
+
+    jumps = []
+    step = 10
+    while step <= paged_list.page_count:
+        before = (first_page_to_display - 1) // step * step
+        if before >= 1:
+            jumps.append(before)
+        after = (last_page_to_display // step + 1) * step
+        if after <= paged_list.page_count:
+            jumps.append(after)
+        step *= 10
+    return sorted(set(numbers).union(jumps))
+
+
+def pager_layout(paged_list, options):
+    """
+    Returns the items of the paging control of paged_list as a list of
+    (kind, page_number) tuples, where page_number is the page an item links
+    to or None for text, or None if no paging control is displayed.
+
+    :rtype : list
+    """
+    # Without a total count only the previous and next links can be
+    # rendered.
+    is_count_known = paged_list.page_count is not None
+    if is_count_known:
+        is_needed = paged_list.page_count > 1
+    else:
+        is_needed = not (paged_list.is_first_page and paged_list.is_last_page)
+
+    if not _is_displayed(options.display, is_needed):
+        return None
+
+    items = []
+    if is_count_known:
+        numbers = page_numbers(paged_list, options)
+        first_page_to_display = numbers[0] if numbers else 1
+        last_page_to_display = numbers[-1] if numbers else 0
+
+    if is_count_known and _is_displayed(options.display_link_to_first_page,
+                                        first_page_to_display > 1):
+        items.append((FIRST, 1))
+
+    if _is_displayed(options.display_link_to_previous_page,
+                     not paged_list.is_first_page):
+        items.append((PREVIOUS, paged_list.page_number - 1))
+
+    if is_count_known and options.display_page_count_and_current_location:
+        items.append((PAGE_COUNT_AND_LOCATION, None))
+
+    if is_count_known and options.display_item_slice_and_total:
+        items.append((ITEM_SLICE_AND_TOTAL, None))
+
+    if is_count_known and options.display_link_to_individual_pages:
+        ellipses = options.display_ellipses_when_not_showing_all_page_numbers
+
+        # If there are previous page numbers not displayed, show an ellipsis
+        if ellipses and first_page_to_display > 1:
+            items.append((ELLIPSES, None))
+
+        previous = None
+        for i in numbers:
+            if previous is not None:
+                # Show an ellipsis between logarithmic jumps, or else the
+                # delimiter between page numbers
+                if ellipses and i > previous + 1:
+                    items.append((ELLIPSES, None))
+                elif options.delimiter_between_page_numbers:
+                    items.append((DELIMITER, None))
+            items.append((PAGE, i))
+            previous = i
+
+        # If there are subsequent page numbers not displayed, show ellipsis
+        if ellipses and last_page_to_display < paged_list.page_count:
+            items.append((ELLIPSES, None))
+
+    if _is_displayed(options.display_link_to_next_page,
+                     not paged_list.is_last_page):
+        items.append((NEXT, paged_list.page_number + 1))
+
+    if is_count_known and _is_displayed(options.display_link_to_last_page,
+                                        last_page_to_display <
+                                        paged_list.page_count):
+        items.append((LAST, paged_list.page_count))
+
+    return items
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import string
+
+import six
+from genshi.core import Markup
+
+
+def escape_text(text):
+    """Escapes text like Genshi does outside of attributes."""
+    if type(text) is Markup:
+        return text
+    if hasattr(text, '__html__'):
+        return text.__html__()
+    return six.text_type(text).replace('&', '&amp;').replace(
+        '<', '&lt;').replace('>', '&gt;')
+
+
+def escape_attribute(value):
+    """
+    Escapes an attribute value like Genshi does, which converts it to a plain
+    string first, so even Markup is escaped.
+    """
+    return escape_text(six.text_type(value)).replace('"', '&#34;')
+
+
+def escape_format(format_string):
+    """
+    Escapes the literal text of a str.format() format string and leaves its
+    replacement fields alone, so that formatting it with numbers gives the
+    same text as escaping the formatted string.
+    """
+    parts = []
+    for literal, field, spec, conversion in \
+            string.Formatter().parse(format_string):
+        parts.append(
+            escape_text(literal).replace('{', '{{').replace('}', '}}'))
+        if field is not None:
+            if conversion:
+                field += '!' + conversion
+            if spec:
+                field += ':' + spec
+            parts.append('{' + field + '}')
+    return ''.join(parts)
@@ -1,7 +1,11 @@
 # -*- coding: utf-8 -*-
+import threading
+
 import genshi
 
 from pagedlist.web.ajax import AjaxOptions
+from pagedlist.web.markup import escape_format
+from pagedlist.web.markup import escape_text
 
 
 class GoToFormRenderOptions(object):
@@ -73,7 +77,13 @@ class PagedListRenderOptions(object):
                  li_element_classes=None,
                  display_item_slice_and_total=False,
                  function_to_transform_each_page_link=None,
-                 delimiter_between_page_numbers=''):
+                 delimiter_between_page_numbers='',
+                 approximate_page_count_and_current_location_format=
+                 "Page {0} of about {1}.",
+                 approximate_item_slice_and_total_format=
+                 "Showing items {0} through {1} of about {2}.",
+                 function_to_display_approximate_count=None,
+                 display_logarithmic_jumps=False):
         """
         The default settings render all navigation links and no descriptive
         text.
@@ -100,7 +110,8 @@ class PagedListRenderOptions(object):
         :param display_page_count_and_current_location: When true, shows the
             current page number and the total number of pages in the list.
         :param maximum_page_numbers_to_display: The maximum number of page
-            numbers to display. Null displays all page numbers.
+            numbers to display. Null displays all page numbers, up to a hard
+            limit of 1000.
         :param display_ellipses_when_not_showing_all_page_numbers: If true,
             adds an ellipsis where not all page numbers are being displayed.
         :param ellipses_format: The pre-formatted text to display when not all
@@ -132,6 +143,20 @@ class PagedListRenderOptions(object):
             index of the first and last items on the page, and the total number
             OF items in the list.
         :param function_to_transform_each_page_link:
+        :param approximate_page_count_and_current_location_format: Used
+            instead of page_count_and_current_location_format when the total
+            item count is an estimate.
+        :param approximate_item_slice_and_total_format: Used instead of
+            item_slice_and_total_format when the total item count is an
+            estimate.
+        :param function_to_display_approximate_count: Formats estimated
+            counts for the approximate formats. By default they are
+            abbreviated, e.g. 1234567 becomes "1.2M".
+        :param display_logarithmic_jumps: When true, also links to the
+            multiples of 10, 100, 1000 and so on nearest to the displayed page
+            numbers, e.g. 1 ... 490 499 500 501 510 ... 1000 ... 10000, so
+            that any page is a few clicks away while the pager grows with the
+            logarithm of the page count.
         """
 
         self.display = display
@@ -154,6 +179,12 @@ class PagedListRenderOptions(object):
         self.page_count_and_current_location_format = \
             page_count_and_current_location_format
         self.item_slice_and_total_format = item_slice_and_total_format
+        self.approximate_page_count_and_current_location_format = \
+            approximate_page_count_and_current_location_format
+        self.approximate_item_slice_and_total_format = \
+            approximate_item_slice_and_total_format
+        self.function_to_display_approximate_count = \
+            function_to_display_approximate_count
         self.function_to_display_each_page_number = \
             function_to_display_each_page_number
         self.class_to_apply_to_first_list_item_in_pager = \
@@ -174,6 +205,23 @@ class PagedListRenderOptions(object):
         self.function_to_transform_each_page_link = \
             function_to_transform_each_page_link
         self.delimiter_between_page_numbers = delimiter_between_page_numbers
+        self.display_logarithmic_jumps = display_logarithmic_jumps
+
+    def fingerprint(self):
+        """
+        Returns a hashable snapshot of the options, e.g. to key rendered
+        pagers by. Functions are compared by identity.
+        """
+        return tuple(sorted(
+            (name, tuple(value) if isinstance(value, list) else value)
+            for name, value in vars(self).items()))
+
+    def compile(self):
+        """
+        Returns an immutable, hashable copy of the options with derived
+        values precomputed, see CompiledRenderOptions.
+        """
+        return CompiledRenderOptions(self)
 
     @classmethod
     def enable_unobtrusive_ajax_replacing(cls, options, ajax_options):
@@ -195,6 +243,8 @@ class PagedListRenderOptions(object):
             li_tag_builder(genshi.core.Markup(str(a_tag_builder)))
             return li_tag_builder
 
+        # Lets PagerRenderer add the attributes without Genshi.
+        transformer.ajax_options = ajax_options
         options.function_to_transform_each_page_link = transformer
         return options
 
@@ -338,3 +388,113 @@ class PagedListRenderOptions(object):
             link_to_previous_page_format='&larr; Older',
             link_to_next_page_format='Newer &rarr;',
         )
+
+
+class CompiledRenderOptions(object):
+    #: The names of the presets of PagedListRenderOptions.
+    presets = ('classic', 'classic_plus_first_and_last', 'minimal',
+               'minimal_with_page_count_text', 'minimal_with_item_count_text',
+               'page_numbers_only', 'only_show_five_pages_at_a_time',
+               'twitter_bootstrap_pager', 'twitter_bootstrap_pager_aligned')
+
+    _option_names = tuple(sorted(vars(PagedListRenderOptions())))
+    __slots__ = _option_names + (
+        'container_div_class', 'ul_element_class', 'li_element_class',
+        'escaped_delimiter_between_page_numbers',
+        'escaped_link_to_individual_page_format',
+        'escaped_page_count_and_current_location_format',
+        'escaped_item_slice_and_total_format', '_key', '_hash')
+
+    _preset_instances = {}
+    _preset_lock = threading.Lock()
+
+    def __init__(self, options=None):
+        """
+        A frozen copy of PagedListRenderOptions, which can be shared between
+        threads and requests and used as a cache key. Builder and
+        PagerRenderer accept it wherever they accept PagedListRenderOptions.
+        Lists of classes become tuples, and the joined classes and the
+        escaped formats are computed once. Functions are compared by
+        identity.
+
+        :param options: The PagedListRenderOptions to copy.
+        """
+        if options is None:
+            options = PagedListRenderOptions()
+        set_attribute = super(CompiledRenderOptions, self).__setattr__
+        key = []
+        for name in self._option_names:
+            value = getattr(options, name)
+            if isinstance(value, list):
+                value = tuple(value)
+            set_attribute(name, value)
+            key.append(value)
+        set_attribute('_key', tuple(key))
+        set_attribute('_hash', hash(self._key))
+
+        set_attribute('container_div_class',
+                      ' '.join(self.container_div_classes))
+        set_attribute('ul_element_class', ' '.join(self.ul_element_classes))
+        set_attribute('li_element_class', ' '.join(self.li_element_classes))
+        set_attribute('escaped_delimiter_between_page_numbers',
+                      escape_text(self.delimiter_between_page_numbers))
+        # Formatted with numbers only, so escaping their text up front is the
+        # same as escaping the formatted text.
+        set_attribute('escaped_link_to_individual_page_format',
+                      escape_format(self.link_to_individual_page_format))
+        set_attribute(
+            'escaped_page_count_and_current_location_format',
+            escape_format(self.page_count_and_current_location_format))
+        set_attribute('escaped_item_slice_and_total_format',
+                      escape_format(self.item_slice_and_total_format))
+
+    @classmethod
+    def preset(cls, name):
+        """
+        Returns the compiled options of the preset of PagedListRenderOptions
+        with the given name, e.g. "classic", which are built once and shared.
+
+        :raise ValueError: If there is no such preset.
+        """
+        instance = cls._preset_instances.get(name)
+        if instance is None:
+            if name not in cls.presets:
+                raise ValueError(
+                    "There is no preset named '{0}'.".format(name))
+            with cls._preset_lock:
+                instance = cls._preset_instances.get(name)
+                if instance is None:
+                    instance = getattr(PagedListRenderOptions, name)()\
+                        .compile()
+                    cls._preset_instances[name] = instance
+        return instance
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledRenderOptions are immutable.")
+
+    def __delattr__(self, name):
+        raise AttributeError("CompiledRenderOptions are immutable.")
+
+    def __eq__(self, other):
+        return isinstance(other, CompiledRenderOptions) and \
+            self._key == other._key
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        options = PagedListRenderOptions()
+        for name in self._option_names:
+            value = getattr(self, name)
+            setattr(options, name,
+                    list(value) if isinstance(value, tuple) else value)
+        return CompiledRenderOptions, (options,)
+
+    def fingerprint(self):
+        return self
+
+    def compile(self):
+        return self
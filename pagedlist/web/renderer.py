@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+import functools
+
+import six
+
+from .. import instrumentation
+from ..cache import LRUCache
+from . import layout as layout_kinds
+from .builder import Builder
+from .layout import pager_layout
+from .markup import escape_attribute
+from .markup import escape_text
+from .options import PagedListRenderOptions
+from .urls import PageUrlTemplate
+
+
+def _escaped_url(page_url_generator, page_number):
+    url = page_url_generator(page_number)
+    return None if url is None else escape_attribute(url)
+
+
+def _add_classes(old_class, classes):
+    # Same rules as Builder._element_with_classes().
+    if old_class and classes and not old_class.endswith(' '):
+        old_class += ' '
+    return old_class + ' '.join(classes)
+
+
+# The classes of the list items by kind and by whether they are disabled,
+# before the classes of options are added.
+_item_classes = {
+    (layout_kinds.FIRST, False): 'PagedList-skipToFirst',
+    (layout_kinds.FIRST, True): 'PagedList-skipToFirst disabled',
+    (layout_kinds.PREVIOUS, False): 'PagedList-skipToPrevious',
+    (layout_kinds.PREVIOUS, True): 'PagedList-skipToPrevious disabled',
+    (layout_kinds.PAGE, False): '',
+    (layout_kinds.PAGE, True): 'active',
+    (layout_kinds.NEXT, False): 'PagedList-skipToNext',
+    (layout_kinds.NEXT, True): 'PagedList-skipToNext disabled',
+    (layout_kinds.LAST, False): 'PagedList-skipToLast',
+    (layout_kinds.LAST, True): 'PagedList-skipToLast disabled',
+    (layout_kinds.ELLIPSES, True): 'PagedList-ellipses disabled',
+    (layout_kinds.PAGE_COUNT_AND_LOCATION, True):
+        'PagedList-pageCountAndLocation disabled',
+    (layout_kinds.ITEM_SLICE_AND_TOTAL, True):
+        'PagedList-pageCountAndLocation disabled',
+    (layout_kinds.DELIMITER, True): '',
+}
+
+
+class PagerRenderer(object):
+    _renderers = LRUCache(maxsize=64)
+
+    def __init__(self, options=None):
+        """
+        Compiles options into string templates once, and then renders the
+        same markup as Builder.paged_list_pager() by string concatenation,
+        without building and serializing a Genshi tree for every pager.
+        Create one renderer per options and reuse it; changes to the options
+        after compiling them are not seen.
+
+        Custom functions to transform each page link cannot be compiled, so
+        such options are rendered by Builder. The one set by
+        enable_unobtrusive_ajax_replacing() is compiled.
+
+        :param options: The PagedListRenderOptions or CompiledRenderOptions
+            to render with.
+        """
+        if options is None:
+            options = PagedListRenderOptions()
+        options = options.compile()
+        self.options = options
+
+        transformer = options.function_to_transform_each_page_link
+        ajax_attributes = ''
+        self.is_compiled = True
+        if transformer is not None:
+            if not hasattr(transformer, 'ajax_options'):
+                self.is_compiled = False
+                return
+            if transformer.ajax_options:
+                ajax_attributes = ''.join(
+                    ' {0}="{1}"'.format(name, escape_attribute(value))
+                    for name, value in six.iteritems(
+                        transformer.ajax_options
+                        .to_unobtrusive_html_attributes())
+                    if value is not None)
+
+        self._prefix = '<div class="{0}"><ul class="{1}">'.format(
+            escape_attribute(options.container_div_class),
+            escape_attribute(options.ul_element_class))
+        self._suffix = '</ul></div>'
+
+        # The opening <li> tag by kind, disabled state and position, the
+        # latter being 1 for the first item and 2 for the last one.
+        first_class = options.class_to_apply_to_first_list_item_in_pager
+        last_class = options.class_to_apply_to_last_list_item_in_pager
+        self._li_tags = {}
+        for key, item_class in six.iteritems(_item_classes):
+            for position in range(4):
+                li_class = item_class
+                if position & 1 and first_class:
+                    li_class = _add_classes(li_class, [first_class])
+                if position & 2 and last_class:
+                    li_class = _add_classes(li_class, [last_class])
+                li_class = _add_classes(li_class, options.li_element_classes)
+                self._li_tags[key + (position,)] = '<li class="{0}">'.format(
+                    escape_attribute(li_class))
+
+        # Like the AJAX transformer, only links to other pages get the
+        # attributes. It tests the classes of the item for substrings.
+        self._ajax_attributes = {}
+        for key, item_class in six.iteritems(_item_classes):
+            if key[0] == layout_kinds.DELIMITER or \
+                    'disabled' in item_class or 'active' in item_class:
+                self._ajax_attributes[key] = ''
+            else:
+                self._ajax_attributes[key] = ajax_attributes
+
+        self._delimiter = options.escaped_delimiter_between_page_numbers
+
+    @classmethod
+    def for_options(cls, options):
+        """
+        Returns a renderer for options, reusing the one compiled for equal
+        options before, e.g. for the presets of CompiledRenderOptions.
+
+        :param options: The PagedListRenderOptions or CompiledRenderOptions
+            to render with.
+        """
+        options = options.compile()
+        renderer = cls._renderers.get(options)
+        if renderer is None:
+            renderer = cls(options)
+            cls._renderers.set(options, renderer)
+        return renderer
+
+    def render(self, paged_list, page_url_generator):
+        """
+        Renders the paging control of paged_list, see
+        Builder.paged_list_pager().
+
+        :rtype : str
+        """
+        if not self.is_compiled:
+            return Builder.paged_list_pager(
+                paged_list, page_url_generator, self.options)
+        return instrumentation.timed(
+            instrumentation.RENDER_PAGER, self._render,
+            (paged_list, page_url_generator),
+            paged_list.page_number, paged_list.page_size)
+
+    def _render(self, paged_list, page_url_generator):
+        layout = pager_layout(paged_list, self.options)
+        if layout is None:
+            return None
+        return ''.join(self._chunks(layout, paged_list, page_url_generator))
+
+    def iter_render(self, paged_list, page_url_generator):
+        """
+        Yields the paging control of paged_list in chunks of at most one list
+        item, e.g. for streaming responses. Yields nothing if no paging
+        control is displayed.
+        """
+        if not self.is_compiled:
+            markup = Builder.paged_list_pager(
+                paged_list, page_url_generator, self.options)
+            if markup is not None:
+                yield markup
+            return
+        layout = pager_layout(paged_list, self.options)
+        if layout is not None:
+            for chunk in self._chunks(layout, paged_list, page_url_generator):
+                yield chunk
+
+    def write(self, output, paged_list, page_url_generator):
+        """
+        Writes the paging control of paged_list chunk by chunk, without
+        joining it into one string first.
+
+        :param output: A write callable, or a file-like object such as
+            io.StringIO.
+        """
+        write = getattr(output, 'write', output)
+        if not self.is_compiled:
+            # Builder emits the event itself.
+            self._write(write, paged_list, page_url_generator)
+            return
+        instrumentation.timed(
+            instrumentation.RENDER_PAGER, self._write,
+            (write, paged_list, page_url_generator),
+            paged_list.page_number, paged_list.page_size)
+
+    def _write(self, write, paged_list, page_url_generator):
+        for chunk in self.iter_render(paged_list, page_url_generator):
+            write(chunk)
+
+    def _chunks(self, layout, paged_list, page_url_generator):
+        page_url_generator = PageUrlTemplate.coerce(page_url_generator)
+        if isinstance(page_url_generator, PageUrlTemplate):
+            escaped_url = page_url_generator.escaped
+        else:
+            escaped_url = functools.partial(_escaped_url, page_url_generator)
+
+        yield self._prefix
+        last_index = len(layout) - 1
+        for index, (kind, page_number) in enumerate(layout):
+            position = (index == 0) | (index == last_index) << 1
+            yield self._item(kind, page_number, position, paged_list,
+                             escaped_url)
+        yield self._suffix
+
+    def _item(self, kind, page_number, position, paged_list, escaped_url):
+        options = self.options
+        rel = ''
+        if kind == layout_kinds.PAGE:
+            disabled = page_number == paged_list.page_number
+            format_func = options.function_to_display_each_page_number
+            if format_func:
+                content = format_func(page_number)
+                content = None if content is None else escape_text(content)
+            else:
+                content = options.escaped_link_to_individual_page_format\
+                    .format(page_number)
+        elif kind == layout_kinds.DELIMITER:
+            return '{0}{1}</li>'.format(
+                self._li_tags[kind, True, position], self._delimiter)
+        elif kind == layout_kinds.PREVIOUS:
+            disabled = not paged_list.has_previous_page
+            content = options.link_to_previous_page_format.format(page_number)
+            rel = ' rel="prev"'
+        elif kind == layout_kinds.NEXT:
+            disabled = not paged_list.has_next_page
+            content = options.link_to_next_page_format.format(page_number)
+            rel = ' rel="next"'
+        elif kind == layout_kinds.FIRST:
+            disabled = paged_list.is_first_page
+            content = options.link_to_first_page_format.format(page_number)
+        elif kind == layout_kinds.LAST:
+            disabled = paged_list.is_last_page
+            content = options.link_to_last_page_format.format(page_number)
+        else:
+            disabled = True
+            if kind == layout_kinds.ELLIPSES:
+                content = options.ellipses_format
+            elif paged_list.is_estimated_count:
+                if kind == layout_kinds.PAGE_COUNT_AND_LOCATION:
+                    content = Builder._page_count_and_location_string(
+                        paged_list, options)
+                else:
+                    content = Builder._item_slice_and_total_string(
+                        paged_list, options)
+                content = escape_text(content)
+            elif kind == layout_kinds.PAGE_COUNT_AND_LOCATION:
+                content = \
+                    options.escaped_page_count_and_current_location_format\
+                    .format(paged_list.page_number, paged_list.page_count)
+            else:
+                content = options.escaped_item_slice_and_total_format.format(
+                    paged_list.first_item_on_page,
+                    paged_list.last_item_on_page, paged_list.total_item_count)
+
+        href = ''
+        if not disabled:
+            url = escaped_url(page_number)
+            if url is not None:
+                href = ' href="{0}"'.format(url)
+        a_tag = '<a{0}{1}{2}'.format(
+            rel, href, self._ajax_attributes[kind, disabled])
+        if content is None:
+            a_tag += '/>'
+        else:
+            a_tag = '{0}>{1}</a>'.format(a_tag, content)
+        return '{0}{1}</li>'.format(
+            self._li_tags[kind, disabled, position], a_tag)
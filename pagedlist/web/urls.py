@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import six
+
+from .markup import escape_attribute
+
+
+class PageUrlTemplate(object):
+    #: Where the page number goes in a template.
+    placeholder = '{page}'
+
+    def __init__(self, template=None, prefix=None, suffix=''):
+        """
+        The URLs of the pages of a list as the same text before and after the
+        page number, e.g. "/items?page={page}&sort=name", so that pagers can
+        build links by concatenation instead of calling a URL generator such
+        as Flask's url_for once per link. Build it once and pass it instead
+        of page_url_generator.
+
+        :param template: The URL with a single "{page}" placeholder. Other
+            braces are left alone.
+        :param prefix: The URL before the page number, instead of template.
+        :param suffix: The URL after the page number, with prefix.
+        :raise ValueError: If template does not contain exactly one
+            placeholder, or neither template nor prefix is given.
+        """
+        if template is not None:
+            if template.count(self.placeholder) != 1:
+                raise ValueError(
+                    "A page URL template must contain {0} exactly once."
+                    .format(self.placeholder))
+            prefix, suffix = template.split(self.placeholder)
+        elif prefix is None:
+            raise ValueError("Either template or prefix must be given.")
+        self.prefix = prefix
+        self.suffix = suffix
+        self._escaped_prefix = escape_attribute(prefix)
+        self._escaped_suffix = escape_attribute(suffix)
+
+    @classmethod
+    def coerce(cls, page_url_generator):
+        """
+        Returns page_url_generator as a PageUrlTemplate if it is a template
+        string or a (prefix, suffix) tuple, or unchanged otherwise.
+        """
+        if isinstance(page_url_generator, six.string_types):
+            return cls(page_url_generator)
+        if isinstance(page_url_generator, tuple):
+            return cls(prefix=page_url_generator[0],
+                       suffix=page_url_generator[1])
+        return page_url_generator
+
+    def __call__(self, page_number):
+        return '{0}{1}{2}'.format(self.prefix, page_number, self.suffix)
+
+    def __eq__(self, other):
+        return isinstance(other, PageUrlTemplate) and \
+            (self.prefix, self.suffix) == (other.prefix, other.suffix)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.prefix, self.suffix))
+
+    def __repr__(self):
+        return 'PageUrlTemplate({0!r})'.format(
+            self.prefix + self.placeholder + self.suffix)
+
+    def escaped(self, page_number):
+        """
+        Returns the URL of a page escaped for an attribute value.
+
+        :rtype : str
+        """
+        return '{0}{1}{2}'.format(
+            self._escaped_prefix, page_number, self._escaped_suffix)
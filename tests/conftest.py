@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+import sys
+
+collect_ignore = []
+if sys.version_info < (3, 3):
+    # LineIndex stores its offsets in array('Q').
+    collect_ignore.append('test_file.py')
+if sys.version_info < (3, 5):
+    collect_ignore.append('test_aio.py')
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+
+class FakeSession(object):
+    """Stands in for a SQLAlchemy session, recording its queries."""
+
+    def __init__(self):
+        self.queries = []
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeQuery(object):
+    """Stands in for a SQLAlchemy query over a list."""
+
+    session = None
+
+    def __init__(self, items):
+        self.items = items
+        self.count_calls = 0
+        self._limit = None
+        self._offset = 0
+
+    def count(self):
+        self.count_calls += 1
+        return len(self.items)
+
+    def limit(self, limit):
+        self._limit = limit
+        return self
+
+    def offset(self, offset):
+        self._offset = offset
+        return self
+
+    def all(self):
+        return self.items[self._offset:self._offset + self._limit]
+
+    def with_session(self, session):
+        query = type(self)(self.items)
+        query.session = session
+        session.queries.append(query)
+        return query
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+import pytest
+
+from pagedlist import AsyncPagedList
+from pagedlist import instrumentation
+
+
+def _run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def _callables(started=None):
+    async def count_fn(query):
+        # Only finishes once the fetch is running too.
+        if started is not None:
+            await asyncio.wait_for(started.wait(), 1)
+        return len(query)
+
+    async def fetch_fn(query, limit, offset):
+        if started is not None:
+            started.set()
+        await asyncio.sleep(0)
+        return query[offset:offset + limit]
+
+    return count_fn, fetch_fn
+
+
+def test_count_and_fetch_run_concurrently():
+    async def create():
+        count_fn, fetch_fn = _callables(asyncio.Event())
+        return await AsyncPagedList.create(list(range(1, 26)), 3, 10,
+                                           count_fn, fetch_fn)
+
+    paged_list = _run(create())
+    assert list(paged_list) == [21, 22, 23, 24, 25]
+    assert paged_list.total_item_count == 25
+    assert paged_list.is_last_page
+
+
+def test_without_count():
+    count_fn, fetch_fn = _callables()
+    paged_list = _run(AsyncPagedList.create(list(range(1, 26)), 2, 10,
+                                            None, fetch_fn, with_count=False))
+    assert list(paged_list) == list(range(11, 21))
+    assert paged_list.has_next_page
+    assert paged_list.page_count is None
+
+
+def test_none_query_is_empty():
+    count_fn, fetch_fn = _callables()
+    paged_list = _run(AsyncPagedList.create(None, 1, 10, count_fn, fetch_fn))
+    assert paged_list.page_count == 0
+    assert list(paged_list) == []
+
+
+def test_page_number_below_one_throws_index_error_exception():
+    count_fn, fetch_fn = _callables()
+    with pytest.raises(IndexError):
+        _run(AsyncPagedList.create([1], 0, 10, count_fn, fetch_fn))
+
+
+def test_create_emits_events():
+    count_fn, fetch_fn = _callables()
+    events = []
+    with instrumentation.listening(events.append):
+        _run(AsyncPagedList.create(list(range(1, 26)), 3, 10, count_fn,
+                                   fetch_fn))
+    events = dict((e.name, e) for e in events)
+    assert events[instrumentation.COUNT].row_count == 25
+    assert (events[instrumentation.FETCH].offset,
+            events[instrumentation.FETCH].row_count) == (20, 5)
+
+
+@pytest.mark.parametrize('call', [
+    lambda: AsyncPagedList.iter_pages(list(range(25)), 10),
+    lambda: AsyncPagedList.iter_items(list(range(25)), 10),
+    lambda: AsyncPagedList.fetch_pages(list(range(25)), [1, 2], 10),
+])
+def test_synchronous_class_methods_are_not_supported(call):
+    with pytest.raises(ValueError):
+        call()
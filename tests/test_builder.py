@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+from pagedlist import PagedList
+from pagedlist import PagerCache
+from pagedlist import SimplePagedList
+from pagedlist.web.builder import Builder
+from pagedlist.web.options import PagedListDisplayMode
+from pagedlist.web.options import PagedListRenderOptions
+from pagedlist.web.urls import PageUrlTemplate
+from tests.fakes import FakeQuery
+
+
+def _url(page_number):
+    return '/items?page=%d' % page_number
+
+
+def test_pager_marks_current_page_active():
+    paged_list = SimplePagedList(list(range(30)), 2, 10)
+    html = Builder.paged_list_pager(paged_list, _url)
+    assert '<li class="active"><a>2</a></li>' in html
+    assert 'href="/items?page=3"' in html
+
+
+def test_pager_limits_page_numbers_to_display():
+    paged_list = SimplePagedList(list(range(1000)), 30, 10)
+    html = Builder.paged_list_pager(paged_list, _url)
+    assert '>25</a>' in html
+    assert '>34</a>' in html
+    assert '>24</a>' not in html
+    assert '>35</a>' not in html
+    assert 'PagedList-skipToLast' in html
+
+
+def test_pager_without_count_renders_previous_and_next_only():
+    paged_list = SimplePagedList(list(range(30)), 2, 10, with_count=False)
+    options = PagedListRenderOptions(
+        display_page_count_and_current_location=True,
+        display_item_slice_and_total=True)
+    html = Builder.paged_list_pager(paged_list, _url, options)
+    assert 'PagedList-skipToPrevious' in html
+    assert 'PagedList-skipToNext' in html
+    assert 'PagedList-skipToLast' not in html
+    assert 'PagedList-pageCountAndLocation' not in html
+    assert '>2</a>' not in html
+
+
+def test_pager_renders_approximate_totals():
+    paged_list = PagedList(FakeQuery(list(range(50))), 1, 10,
+                           count_estimator=lambda q: 1234567,
+                           exact_count_threshold=1000)
+    options = PagedListRenderOptions.minimal_with_item_count_text()
+    html = Builder.paged_list_pager(paged_list, _url, options)
+    assert 'Showing items 1 through 10 of about 1.2M.' in html
+
+
+@pytest.mark.parametrize('count, expected', [
+    (999, '999'),
+    (1000, '1K'),
+    (12345, '12K'),
+    (1250000, '1.2M'),
+    (3000000000, '3B'),
+])
+def test_approximate_count(count, expected):
+    assert Builder._approximate_count(count) == expected
+
+
+def test_pager_cache_reuses_rendered_pagers(monkeypatch):
+    cache = PagerCache()
+    options = PagedListRenderOptions()
+    first = Builder.paged_list_pager(
+        SimplePagedList(list(range(100)), 3, 10), _url, options, cache=cache,
+        url_key='items')
+
+    def fail(*args):
+        raise AssertionError("rendered again")
+    monkeypatch.setattr(Builder, '_paged_list_pager', fail)
+    assert Builder.paged_list_pager(
+        SimplePagedList(list(range(100)), 3, 10), _url, options,
+        cache=cache, url_key='items') == first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_pager_cache_keys_by_position_options_and_urls():
+    cache = PagerCache()
+    paged_list = SimplePagedList(list(range(100)), 3, 10)
+    options = PagedListRenderOptions()
+    html = Builder.paged_list_pager(paged_list, _url, options, cache=cache,
+                                    url_key='items')
+    assert Builder.paged_list_pager(
+        SimplePagedList(list(range(100)), 4, 10), _url, options,
+        cache=cache, url_key='items') != html
+    options.link_to_next_page_format = 'Next'
+    assert 'Next' in Builder.paged_list_pager(paged_list, _url, options,
+                                              cache=cache, url_key='items')
+    assert '/other/4' in Builder.paged_list_pager(
+        paged_list, '/other/{0}'.format, options, cache=cache,
+        url_key='other')
+    assert cache.hits == 0
+
+
+def test_pager_cache_remembers_hidden_pagers():
+    cache = PagerCache()
+    options = PagedListRenderOptions(display=PagedListDisplayMode.IfNeeded)
+    for _ in range(2):
+        assert Builder.paged_list_pager(
+            SimplePagedList(list(range(5)), 1, 10), '/items/{page}',
+            options, cache=cache) is None
+    assert cache.hits == 1
+
+
+def test_pager_cache_needs_url_key_for_functions():
+    paged_list = SimplePagedList(list(range(100)), 3, 10)
+    with pytest.raises(ValueError):
+        Builder.paged_list_pager(paged_list, _url, cache=PagerCache())
+    template = PageUrlTemplate('/items?page={page}')
+    cache = PagerCache()
+    for url in (template, '/items?page={page}', ('/items?page=', '')):
+        Builder.paged_list_pager(paged_list, url, cache=cache)
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_pager_with_url_template_matches_url_generator():
+    paged_list = SimplePagedList(list(range(1000)), 30, 10)
+    options = PagedListRenderOptions.classic_plus_first_and_last()
+
+    def url(page_number):
+        return '/items?page=%d&sort="name"' % page_number
+
+    expected = Builder.paged_list_pager(paged_list, url, options)
+    assert 'href="/items?page=29&amp;sort=&#34;name&#34;"' in expected
+    for template in ('/items?page={page}&sort="name"',
+                     ('/items?page=', '&sort="name"'),
+                     PageUrlTemplate(prefix='/items?page=',
+                                     suffix='&sort="name"')):
+        assert Builder.paged_list_pager(
+            paged_list, template, options) == expected
+
+
+def test_page_url_template():
+    template = PageUrlTemplate('/items/{page}?q={0}')
+    assert template(3) == '/items/3?q={0}'
+    assert template == PageUrlTemplate(prefix='/items/', suffix='?q={0}')
+    assert hash(template) == hash(PageUrlTemplate('/items/{page}?q={0}'))
+    with pytest.raises(ValueError):
+        PageUrlTemplate('/items')
+    with pytest.raises(ValueError):
+        PageUrlTemplate('/items/{page}/{page}')
+
+
+def test_pager_model_describes_links():
+    paged_list = SimplePagedList(list(range(1000)), 30, 10)
+    options = PagedListRenderOptions(
+        maximum_page_numbers_to_display=3,
+        display_page_count_and_current_location=True)
+    model = Builder.paged_list_pager_model(
+        paged_list, '/items?page={page}', options)
+    assert json.loads(json.dumps(model)) == model
+    assert [(link['kind'], link['page']) for link in model] == [
+        ('first', 1), ('previous', 29), ('page_count_and_location', None),
+        ('ellipses', None), ('page', 29), ('page', 30), ('page', 31),
+        ('ellipses', None), ('next', 31), ('last', 100)]
+    assert model[0] == {'page': 1, 'kind': 'first', 'disabled': False,
+                        'active': False, 'href': '/items?page=1'}
+    assert model[2]['disabled'] and model[2]['href'] is None
+    assert model[5] == {'page': 30, 'kind': 'page', 'disabled': False,
+                        'active': True, 'href': None}
+
+
+def test_pager_model_disables_links_on_first_page():
+    paged_list = SimplePagedList(list(range(30)), 1, 10)
+    model = Builder.paged_list_pager_model(
+        paged_list, _url, PagedListRenderOptions.minimal())
+    assert model == [
+        {'page': None, 'kind': 'previous', 'disabled': True, 'active': False,
+         'href': None},
+        {'page': 2, 'kind': 'next', 'disabled': False, 'active': False,
+         'href': '/items?page=2'}]
+
+
+def test_pager_model_has_no_pages_past_the_last_one():
+    paged_list = SimplePagedList(list(range(30)), 3, 10)
+    model = Builder.paged_list_pager_model(
+        paged_list, _url, PagedListRenderOptions.classic_plus_first_and_last())
+    assert [(link['kind'], link['page']) for link in model
+            if link['disabled']] == [('next', None), ('last', None)]
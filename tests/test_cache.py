@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from pagedlist import CountCache
+from pagedlist import LRUCache
+from pagedlist import PageCache
+from pagedlist import PagedList
+from tests.fakes import FakeQuery
+from tests.fakes import FakeSession
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert 'b' not in cache
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+def test_lru_cache_expires_entries():
+    clock = FakeClock()
+    cache = LRUCache(ttl=10, timer=clock)
+    cache.set('a', 1)
+    clock.now = 9
+    assert cache.get('a') == 1
+    clock.now = 10
+    assert cache.get('a') is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.hit_rate == 0.5
+
+
+def test_count_cache_skips_repeated_count():
+    cache = CountCache(key_fn=id)
+    query = FakeQuery(list(range(25)))
+    first = PagedList(query, 1, 10, count_cache=cache)
+    second = PagedList(query, 2, 10, count_cache=cache)
+    assert query.count_calls == 1
+    assert first.page_count == second.page_count == 3
+    assert list(second) == list(range(10, 20))
+
+
+def test_count_cache_invalidate():
+    cache = CountCache(key_fn=id)
+    query = FakeQuery(list(range(25)))
+    PagedList(query, 1, 10, count_cache=cache)
+    query.items.append(25)
+    cache.invalidate(query)
+    assert PagedList(query, 1, 10, count_cache=cache).total_item_count == 26
+    assert query.count_calls == 2
+
+
+def test_query_fingerprint_includes_parameters():
+    sqlalchemy = pytest.importorskip('sqlalchemy')
+    from pagedlist.sqla import query_fingerprint
+
+    table = sqlalchemy.table('t', sqlalchemy.column('x'))
+    one = sqlalchemy.select(table).where(table.c.x == 1)
+    assert query_fingerprint(one) == query_fingerprint(
+        sqlalchemy.select(table).where(table.c.x == 1))
+    assert query_fingerprint(one) != query_fingerprint(
+        sqlalchemy.select(table).where(table.c.x == 2))
+
+
+def test_lru_cache_evicts_by_weight():
+    cache = LRUCache(maxsize=5, weigh=len)
+    cache.set('a', 'xx')
+    cache.set('b', 'yyy')
+    cache.set('c', 'z')
+    assert 'a' not in cache
+    cache.set('d', 'too long')
+    assert 'd' not in cache
+    assert cache.get('b') == 'yyy'
+
+
+class FetchCountingQuery(FakeQuery):
+    fetch_calls = 0
+
+    def all(self):
+        self.fetch_calls += 1
+        return super(FetchCountingQuery, self).all()
+
+
+def test_page_cache_serves_repeated_page():
+    cache = PageCache(key_fn=id)
+    query = FetchCountingQuery(list(range(25)))
+    for _ in range(2):
+        paged_list = PagedList(query, 2, 10, page_cache=cache)
+        assert list(paged_list) == list(range(10, 20))
+    assert query.fetch_calls == 1
+    assert cache.hits == 1
+
+
+def test_page_cache_prefetches_neighbours():
+    cache = PageCache(key_fn=id, prefetch=1)
+    query = FetchCountingQuery(list(range(35)))
+    list(PagedList(query, 2, 10, page_cache=cache))
+    assert query.fetch_calls == 3
+    paged_list = PagedList(query, 3, 10, page_cache=cache)
+    assert list(paged_list) == list(range(20, 30))
+    assert list(PagedList(query, 1, 10, page_cache=cache)) == list(range(10))
+    # Page 4 was prefetched while serving page 3.
+    paged_list = PagedList(query, 4, 10, page_cache=cache)
+    assert list(paged_list) == list(range(30, 35))
+    assert query.fetch_calls == 4
+
+
+def test_page_cache_prefetches_pages_without_count():
+    cache = PageCache(key_fn=id, prefetch=1)
+    query = FetchCountingQuery(list(range(35)))
+    list(PagedList(query, 2, 10, with_count=False, page_cache=cache))
+    assert query.fetch_calls == 3
+    for page_number in (1, 3):
+        paged_list = PagedList(query, page_number, 10, with_count=False,
+                               page_cache=cache)
+        assert list(paged_list) == list(range(page_number * 10 - 10,
+                                              page_number * 10))
+        assert paged_list.has_next_page
+    assert query.fetch_calls == 4
+    assert cache.hits == 2
+
+
+def test_page_cache_prefetches_with_session_from_factory():
+    futures = pytest.importorskip('concurrent.futures')
+    sessions = []
+
+    def session_factory():
+        sessions.append(FakeSession())
+        return sessions[-1]
+
+    query = FetchCountingQuery(list(range(35)))
+    query.session = FakeSession()
+    with futures.ThreadPoolExecutor(max_workers=1) as executor:
+        cache = PageCache(key_fn=id, prefetch=1, executor=executor,
+                          session_factory=session_factory)
+        list(PagedList(query, 2, 10, page_cache=cache))
+    assert query.fetch_calls == 1
+    assert sessions[0].queries[0].fetch_calls == 2
+    assert sessions[0].closed
+    cache.prefetch = 0
+    paged_list = PagedList(query, 3, 10, page_cache=cache)
+    assert list(paged_list) == list(range(20, 30))
+    assert query.fetch_calls == 1
+
+
+def test_page_cache_prefetch_on_executor_needs_session_factory():
+    futures = pytest.importorskip('concurrent.futures')
+    query = FetchCountingQuery(list(range(35)))
+    query.session = FakeSession()
+    with futures.ThreadPoolExecutor(max_workers=1) as executor:
+        cache = PageCache(key_fn=id, prefetch=1, executor=executor)
+        with pytest.raises(ValueError):
+            list(PagedList(query, 2, 10, page_cache=cache))
+    assert query.fetch_calls == 0
+
+
+def test_page_cache_invalidate():
+    cache = PageCache(key_fn=id)
+    query = FetchCountingQuery(list(range(25)))
+    other = FetchCountingQuery(list(range(25)))
+    list(PagedList(query, 1, 10, page_cache=cache))
+    list(PagedList(other, 1, 10, page_cache=cache))
+    cache.invalidate(query)
+    assert len(cache) == 1
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import pytest
+
+futures = pytest.importorskip('concurrent.futures')
+
+from pagedlist import PagedList
+from tests.fakes import FakeQuery
+from tests.fakes import FakeSession
+
+
+class ThreadRecordingQuery(FakeQuery):
+    def __init__(self, items, count_error=None, count_delay=None):
+        super(ThreadRecordingQuery, self).__init__(items)
+        self.count_error = count_error
+        self.count_delay = count_delay
+        self.count_thread = None
+
+    def count(self):
+        self.count_thread = threading.current_thread()
+        if self.count_delay is not None:
+            self.count_delay.wait(5)
+        if self.count_error is not None:
+            raise self.count_error
+        return super(ThreadRecordingQuery, self).count()
+
+
+@pytest.fixture
+def executor():
+    with futures.ThreadPoolExecutor(max_workers=1) as executor:
+        yield executor
+
+
+def test_count_runs_on_executor(executor):
+    query = ThreadRecordingQuery(list(range(25)))
+    paged_list = PagedList(query, 3, 10, executor=executor)
+    assert list(paged_list) == list(range(20, 25))
+    assert paged_list.page_count == 3
+    assert query.count_thread is not threading.current_thread()
+
+
+def test_count_uses_session_from_factory(executor):
+    sessions = []
+
+    def session_factory():
+        sessions.append(FakeSession())
+        return sessions[-1]
+
+    query = ThreadRecordingQuery(list(range(25)))
+    paged_list = PagedList(query, 1, 10, executor=executor,
+                           session_factory=session_factory)
+    assert paged_list.total_item_count == 25
+    assert query.count_calls == 0
+    assert sessions[0].queries[0].count_calls == 1
+    assert sessions[0].closed
+
+
+def test_count_error_is_propagated(executor):
+    query = ThreadRecordingQuery(list(range(25)),
+                                 count_error=RuntimeError('boom'))
+    with pytest.raises(RuntimeError):
+        PagedList(query, 1, 10, executor=executor)
+
+
+def test_count_timeout(executor):
+    release = threading.Event()
+    query = ThreadRecordingQuery(list(range(25)), count_delay=release)
+    try:
+        with pytest.raises(futures.TimeoutError):
+            PagedList(query, 1, 10, executor=executor, timeout=0.01)
+    finally:
+        release.set()
+
+
+def test_query_bound_to_session_needs_session_factory(executor):
+    query = ThreadRecordingQuery(list(range(25)))
+    query.session = FakeSession()
+    with pytest.raises(ValueError):
+        PagedList(query, 1, 10, executor=executor)
+    assert query.count_calls == 0
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+
+import pytest
+
+from pagedlist import FilePagedList
+from pagedlist import LineIndex
+
+
+@pytest.fixture
+def path(tmpdir):
+    path = str(tmpdir.join('items.jsonl'))
+    with open(path, 'w') as f:
+        for i in range(25):
+            f.write(json.dumps({'id': i}) + '\n')
+    return path
+
+
+def test_pages_lines(path):
+    paged_list = FilePagedList(path, 3, 10, decode=json.loads)
+    assert paged_list.total_item_count == 25
+    assert [item['id'] for item in paged_list] == list(range(20, 25))
+
+
+def test_index_is_persisted(path):
+    LineIndex(path)
+    assert os.path.exists(path + '.idx')
+
+    index = LineIndex(path)
+    assert len(index) == 25
+    assert index.read_lines(1, 2) == [b'{"id": 1}']
+
+
+def test_index_updates_when_file_is_appended_to(path):
+    index = LineIndex(path)
+    with open(path, 'a') as f:
+        f.write('{"id": 25}\n{"id": 2')
+    paged_list = FilePagedList(index, 3, 10)
+    # The incomplete last line is not indexed yet.
+    assert list(paged_list)[-1] == b'{"id": 25}'
+    assert len(LineIndex(path)) == 26
+
+
+def test_index_is_rebuilt_when_file_is_rewritten(path):
+    LineIndex(path)
+    with open(path, 'w') as f:
+        f.write('a\nb\n')
+    assert LineIndex(path).read_lines(0, 10) == [b'a', b'b']
+
+
+def test_empty_file(tmpdir):
+    path = str(tmpdir.join('empty.jsonl'))
+    open(path, 'w').close()
+    paged_list = FilePagedList(path, 1, 10)
+    assert paged_list.page_count == 0
+    assert list(paged_list) == []
+
+
+def test_index_is_rebuilt_when_lines_keep_their_lengths(path):
+    with open(path, 'w') as f:
+        f.write('a\nb\n')
+    LineIndex(path)
+    with open(path, 'w') as f:
+        f.write('c\nd\n')
+    assert LineIndex(path).read_lines(0, 10) == [b'c', b'd']
+
+
+def test_pages_share_one_index(path, monkeypatch):
+    loads = []
+    load = LineIndex._load
+
+    def counting_load(self):
+        loads.append(self.path)
+        load(self)
+
+    monkeypatch.setattr(LineIndex, '_load', counting_load)
+    items = list(FilePagedList.iter_items(path, 10, decode=json.loads))
+    assert [item['id'] for item in items] == list(range(25))
+    pages = FilePagedList.fetch_pages(path, [3, 1], 10)
+    assert [len(page) for page in pages] == [5, 10]
+    assert len(loads) == 2
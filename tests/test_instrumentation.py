@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import itertools
+import logging
+
+from pagedlist import PagedList
+from pagedlist import SimplePagedList
+from pagedlist import instrumentation
+from pagedlist.web.builder import Builder
+from tests.fakes import FakeQuery
+
+
+def test_without_listeners_nothing_is_timed(monkeypatch):
+    def fail():
+        raise AssertionError("timer called")
+    monkeypatch.setattr(instrumentation, '_timer', fail)
+    paged_list = PagedList(FakeQuery(range(100)), 3, 10)
+    assert list(paged_list) == list(range(20, 30))
+
+
+def test_count_and_fetch_emit_events():
+    events = []
+    with instrumentation.listening(events.append):
+        paged_list = PagedList(FakeQuery(range(100)), 3, 10)
+        list(paged_list)
+
+    assert [e.name for e in events] == [instrumentation.COUNT,
+                                        instrumentation.FETCH]
+    count, fetch = events
+    assert (count.page_number, count.page_size, count.row_count) == \
+        (3, 10, 100)
+    assert (fetch.page_number, fetch.page_size, fetch.offset,
+            fetch.row_count) == (3, 10, 20, 10)
+    assert all(e.duration >= 0 for e in events)
+
+
+def test_listening_removes_listener():
+    events = []
+    with instrumentation.listening(events.append):
+        pass
+    list(SimplePagedList(range(10), 1, 5))
+    assert events == []
+
+
+def test_rendering_emits_events():
+    events = []
+    paged_list = SimplePagedList(range(100), 3, 10)
+    with instrumentation.listening(events.append):
+        pager = Builder.paged_list_pager(paged_list, str)
+        form = Builder.paged_list_goto_page_form(paged_list, '/items')
+
+    assert [e.name for e in events] == [
+        instrumentation.RENDER_PAGER, instrumentation.RENDER_GOTO_PAGE_FORM]
+    assert events[0].size == len(pager)
+    assert events[1].size == len(form)
+    assert events[0].page_number == 3
+
+
+def test_slow_page_logger_logs_slow_operations_only(monkeypatch, caplog):
+    clock = itertools.count(step=0.5)
+    monkeypatch.setattr(instrumentation, '_timer', lambda: next(clock))
+    logger = instrumentation.SlowPageLogger(threshold=0.5)
+    with caplog.at_level(logging.WARNING, 'pagedlist.instrumentation'):
+        with instrumentation.listening(logger):
+            paged_list = PagedList(FakeQuery(range(100)), 10, 10)
+            list(paged_list)
+            Builder.paged_list_pager(paged_list, str)
+
+    messages = [r.getMessage() for r in caplog.records]
+    assert len(messages) == 2
+    assert messages[1] == ("Slow fetch took 0.500s for page 10 "
+                           "(page_size=10, offset=90, rows=10).")
+
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, 'pagedlist.instrumentation'):
+        with instrumentation.listening(
+                instrumentation.SlowPageLogger(threshold=1.0)):
+            list(PagedList(FakeQuery(range(100)), 10, 10))
+    assert caplog.records == []
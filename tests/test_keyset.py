@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+import datetime
+import decimal
+import uuid
+
+import pytest
+
+sqlalchemy = pytest.importorskip('sqlalchemy')
+
+from sqlalchemy import Column
+from sqlalchemy import DateTime
+from sqlalchemy import Integer
+from sqlalchemy import String
+from sqlalchemy import create_engine
+from sqlalchemy import desc
+from sqlalchemy.orm import sessionmaker
+
+try:
+    from sqlalchemy.orm import declarative_base
+except ImportError:
+    from sqlalchemy.ext.declarative import declarative_base
+
+from pagedlist import KeysetCursor
+from pagedlist import KeysetPagedList
+from pagedlist import keyset
+from pagedlist.web.builder import Builder
+from pagedlist.web.options import PagedListRenderOptions
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = 'items'
+    id = Column(Integer, primary_key=True)
+    group = Column(String)
+
+
+class Event(Base):
+    __tablename__ = 'events'
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    # Two interleaved groups so the sort needs the tie breaking key.
+    session.add_all([Item(id=i, group='ab'[i % 2]) for i in range(1, 24)])
+    session.commit()
+    return session
+
+
+def _ids(paged_list):
+    return [item.id for item in paged_list]
+
+
+def test_first_page_without_cursor(session):
+    paged_list = KeysetPagedList(session.query(Item), None, 5, [Item.id])
+    assert _ids(paged_list) == [1, 2, 3, 4, 5]
+    assert paged_list.page_number == 1
+    assert paged_list.page_count == 5
+    assert paged_list.previous_cursor is None
+
+
+def test_walk_forward_and_back(session):
+    keys = [Item.group, Item.id]
+    query = session.query(Item)
+    expected = sorted(query.all(), key=lambda item: (item.group, item.id))
+    expected = [item.id for item in expected]
+
+    paged_list = KeysetPagedList(query, None, 5, keys)
+    seen = _ids(paged_list)
+    while paged_list.has_next_page:
+        paged_list = KeysetPagedList(query, paged_list.next_cursor, 5, keys)
+        seen.extend(_ids(paged_list))
+    assert seen == expected
+    assert paged_list.is_last_page
+    assert paged_list.first_item_on_page == 21
+
+    paged_list = KeysetPagedList(query, paged_list.previous_cursor, 5, keys)
+    assert paged_list.page_number == 4
+    assert _ids(paged_list) == expected[15:20]
+
+
+def test_descending_key(session):
+    keys = [desc(Item.id)]
+    query = session.query(Item)
+    paged_list = KeysetPagedList(query, None, 10, keys)
+    paged_list = KeysetPagedList(query, paged_list.next_cursor, 10, keys)
+    assert _ids(paged_list) == list(range(13, 3, -1))
+
+
+def test_last_page_cursor(session):
+    query = session.query(Item)
+    paged_list = KeysetPagedList(query, None, 5, [Item.id])
+    cursor = paged_list.cursor_for_page(paged_list.page_count)
+    paged_list = KeysetPagedList(query, cursor, 5, [Item.id])
+    assert _ids(paged_list) == [21, 22, 23]
+    assert paged_list.is_last_page
+
+
+def test_unreachable_page_raises_index_error(session):
+    paged_list = KeysetPagedList(session.query(Item), None, 5, [Item.id])
+    with pytest.raises(IndexError):
+        paged_list.cursor_for_page(3)
+
+
+def test_malformed_cursor_raises_value_error(session):
+    with pytest.raises(ValueError):
+        KeysetPagedList(session.query(Item), 'not a cursor', 5, [Item.id])
+
+
+def test_renders_with_minimal_pager(session):
+    paged_list = KeysetPagedList(session.query(Item), None, 5, [Item.id])
+    html = Builder.paged_list_pager(
+        paged_list, lambda n: '/?c=%s' % paged_list.cursor_for_page(n),
+        PagedListRenderOptions.minimal())
+    assert paged_list.next_cursor in html
+
+
+def test_without_count(session):
+    query = session.query(Item)
+    paged_list = KeysetPagedList(query, None, 10, [Item.id], with_count=False)
+    paged_list = KeysetPagedList(query, paged_list.next_cursor, 10, [Item.id],
+                                 with_count=False)
+    paged_list = KeysetPagedList(query, paged_list.next_cursor, 10, [Item.id],
+                                 with_count=False)
+    assert _ids(paged_list) == [21, 22, 23]
+    assert paged_list.is_last_page
+    assert paged_list.total_item_count is None
+
+    paged_list = KeysetPagedList(query, paged_list.previous_cursor, 10,
+                                 [Item.id], with_count=False)
+    assert _ids(paged_list) == list(range(11, 21))
+    assert paged_list.has_next_page
+
+
+def test_iter_items(session):
+    items = KeysetPagedList.iter_items(session.query(Item), 10, keys=[Item.id])
+    assert [item.id for item in items] == list(range(1, 24))
+
+
+def test_fetch_pages_is_not_supported(session):
+    with pytest.raises(ValueError):
+        KeysetPagedList.fetch_pages(session.query(Item), [1, 2], 5,
+                                    keys=[Item.id])
+
+
+def test_cursor_round_trips_non_json_key_values():
+    values = [datetime.datetime(2020, 1, 2, 3, 4, 5, 6),
+              datetime.date(2020, 1, 2), datetime.time(3, 4, 5),
+              decimal.Decimal('1.10'), uuid.UUID(int=7), b'\x00\xff',
+              None, 'text', 3]
+    cursor = KeysetCursor.decode(
+        KeysetCursor(2, KeysetCursor.Next, values).encode())
+    assert cursor.values == values
+
+
+@pytest.mark.parametrize('timezone', [None, keyset._FixedOffset])
+def test_cursor_round_trips_aware_datetimes(timezone, monkeypatch):
+    if timezone is not None:
+        monkeypatch.setattr(keyset, '_timezone', timezone)
+    offset = datetime.timedelta(hours=-5, minutes=-30)
+    value = datetime.datetime(2020, 1, 2, 3, 4, 5, tzinfo=keyset._timezone(
+        offset))
+    decoded = KeysetCursor.decode(
+        KeysetCursor(2, KeysetCursor.Next, [value]).encode()).values[0]
+    assert decoded == value
+    assert decoded.utcoffset() == offset
+
+
+@pytest.mark.parametrize('token', [
+    KeysetCursor(0, KeysetCursor.Next, [1]).encode(),
+    KeysetCursor(3, None, None).encode(),
+    KeysetCursor(2, KeysetCursor.Next, [{'$date': 'x'}]).encode(),
+])
+def test_malformed_cursors_are_rejected(token):
+    with pytest.raises(ValueError):
+        KeysetCursor.decode(token)
+
+
+def test_pages_by_datetime_keys(session):
+    start = datetime.datetime(2020, 1, 1)
+    session.add_all([Event(id=i, created_at=start + datetime.timedelta(
+        hours=i // 2)) for i in range(1, 12)])
+    session.commit()
+    keys = [Event.created_at, Event.id]
+    pages = list(KeysetPagedList.iter_pages(session.query(Event), 4,
+                                            keys=keys))
+    assert [_ids(page) for page in pages] == [
+        [1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11]]
+
+
+def test_page_number_of_cursor_is_clamped(session):
+    token = KeysetCursor(999, KeysetCursor.Next, [1]).encode()
+    paged_list = KeysetPagedList(session.query(Item), token, 5, [Item.id])
+    assert paged_list.page_number == paged_list.page_count == 5
+    assert paged_list.first_item_on_page == 21
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from pagedlist import SimplePagedList
+from pagedlist.web import layout
+from pagedlist.web.builder import Builder
+from pagedlist.web.options import PagedListRenderOptions
+from pagedlist.web.renderer import PagerRenderer
+
+
+def _url(page_number):
+    return '/items?page=%d' % page_number
+
+
+def test_page_numbers_are_capped():
+    paged_list = SimplePagedList(range(200000), 1000, 1)
+    options = PagedListRenderOptions(maximum_page_numbers_to_display=None)
+    numbers = layout.page_numbers(paged_list, options)
+    assert len(numbers) == layout.HARD_MAXIMUM_PAGE_NUMBERS_TO_DISPLAY
+    assert numbers[0] == 500
+    html = Builder.paged_list_pager(paged_list, _url, options)
+    assert 'PagedList-skipToLast' in html
+
+
+def test_logarithmic_jumps():
+    paged_list = SimplePagedList(range(10000), 500, 1)
+    options = PagedListRenderOptions(maximum_page_numbers_to_display=3,
+                                     display_logarithmic_jumps=True)
+    assert layout.page_numbers(paged_list, options) == [
+        400, 490, 499, 500, 501, 510, 600, 1000, 10000]
+
+    kinds = [kind for kind, _ in layout.pager_layout(paged_list, options)]
+    assert kinds == ['first', 'previous', 'ellipses', 'page', 'ellipses',
+                     'page', 'ellipses', 'page', 'page', 'page', 'ellipses',
+                     'page', 'ellipses', 'page', 'ellipses', 'page',
+                     'ellipses', 'page', 'next']
+
+
+def test_logarithmic_jumps_are_bounded():
+    options = PagedListRenderOptions(display_logarithmic_jumps=True)
+    paged_list = SimplePagedList(range(10 ** 9), 123456789, 1)
+    assert len(layout.page_numbers(paged_list, options)) <= \
+        options.maximum_page_numbers_to_display + 2 * 9
+
+
+def test_logarithmic_jumps_render_the_same_with_renderer():
+    options = PagedListRenderOptions(display_logarithmic_jumps=True,
+                                     delimiter_between_page_numbers='|')
+    for page_number in (1, 57, 4321, 9999):
+        paged_list = SimplePagedList(range(10000), page_number, 1)
+        html = Builder.paged_list_pager(paged_list, _url, options)
+        assert PagerRenderer(options).render(paged_list, _url) == html
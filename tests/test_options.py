@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import pickle
+
+import pytest
+
+from pagedlist import PagerCache
+from pagedlist import SimplePagedList
+from pagedlist.web.builder import Builder
+from pagedlist.web.markup import escape_format
+from pagedlist.web.options import CompiledRenderOptions
+from pagedlist.web.options import PagedListRenderOptions
+from pagedlist.web.renderer import PagerRenderer
+
+
+def _url(page_number):
+    return '/items?page=%d' % page_number
+
+
+def test_compiled_options_are_immutable_and_hashable():
+    options = PagedListRenderOptions(li_element_classes=['a', 'b'])
+    compiled = options.compile()
+    assert compiled.li_element_classes == ('a', 'b')
+    assert compiled.li_element_class == 'a b'
+    with pytest.raises(AttributeError):
+        compiled.display = 1
+    assert compiled == PagedListRenderOptions(
+        li_element_classes=['a', 'b']).compile()
+    assert hash(compiled) == hash(options.compile())
+    assert compiled != PagedListRenderOptions().compile()
+    assert compiled.compile() is compiled
+    assert pickle.loads(pickle.dumps(compiled)) == compiled
+
+
+def test_presets_are_shared():
+    classic = CompiledRenderOptions.preset('classic')
+    assert CompiledRenderOptions.preset('classic') is classic
+    assert classic == PagedListRenderOptions.classic().compile()
+    with pytest.raises(ValueError):
+        CompiledRenderOptions.preset('compile')
+
+
+def test_presets_list_every_preset():
+    # Presets are the class methods building options without arguments.
+    presets = [name for name, value in vars(PagedListRenderOptions).items()
+               if isinstance(value, classmethod) and
+               not name.startswith('enable_')]
+    assert sorted(CompiledRenderOptions.presets) == sorted(presets)
+
+
+@pytest.mark.parametrize('preset', CompiledRenderOptions.presets)
+def test_compiled_options_render_the_same(preset):
+    compiled = CompiledRenderOptions.preset(preset)
+    options = getattr(PagedListRenderOptions, preset)()
+    paged_list = SimplePagedList(list(range(1000)), 30, 10)
+    expected = Builder.paged_list_pager(paged_list, _url, options)
+    assert Builder.paged_list_pager(paged_list, _url, compiled) == expected
+    assert PagerRenderer.for_options(compiled).render(
+        paged_list, _url) == expected
+
+
+def test_renderers_are_shared_by_equal_options():
+    renderer = PagerRenderer.for_options(PagedListRenderOptions.minimal())
+    assert PagerRenderer.for_options(
+        CompiledRenderOptions.preset('minimal')) is renderer
+
+
+def test_pager_cache_hits_with_compiled_options():
+    cache = PagerCache()
+    paged_list = SimplePagedList(list(range(1000)), 30, 10)
+    for _ in range(2):
+        Builder.paged_list_pager(paged_list, _url,
+                                 CompiledRenderOptions.preset('classic'),
+                                 cache=cache, url_key='items')
+    assert cache.hits == 1
+
+
+def test_escape_format_leaves_replacement_fields_alone():
+    format_string = '<b>{0:>4}</b> & {{{1!r}}}'
+    escaped = escape_format(format_string)
+    assert escaped == '&lt;b&gt;{0:>4}&lt;/b&gt; &amp; {{{1!r}}}'
+    assert escaped.format(12, 3) == \
+        '&lt;b&gt;  12&lt;/b&gt; &amp; {3}'
@@ -1,7 +1,16 @@
 # -*- coding: utf-8 -*-
+import array
+import pickle
+
 import pytest
 
+from pagedlist import IteratorPagedList
+from pagedlist import PagedList
+from pagedlist import PagedListMetaData
+from pagedlist import SequenceView
+from pagedlist import SharedIterator
 from pagedlist import SimplePagedList
+from tests.fakes import FakeQuery
 
 
 def test_none_data_doesnt_thrown_exception():
@@ -156,3 +165,299 @@ def test_is_first_page_and_is_last_page_are_correct(
 def test_page_count_is_correct(integers, page_size, expected_number_of_pages):
     paged_list = SimplePagedList(integers, 1, page_size)
     assert paged_list.page_count == expected_number_of_pages
+
+
+class CountingPagedList(SimplePagedList):
+    fetches = 0
+
+    def _query_limit_offset_fn(self, query, limit, offset):
+        self.fetches += 1
+        return super(CountingPagedList, self)._query_limit_offset_fn(
+            query, limit, offset)
+
+
+def test_subset_is_not_fetched_for_metadata():
+    paged_list = CountingPagedList(list(range(1, 11)), 2, 3)
+    metadata = paged_list.metadata()
+    assert metadata.page_count == 4
+    assert metadata.last_item_on_page == 6
+    assert paged_list.fetches == 0
+
+
+def test_subset_is_fetched_once_on_first_access():
+    paged_list = CountingPagedList(list(range(1, 11)), 2, 3)
+    assert 5 in paged_list
+    assert list(paged_list) == [4, 5, 6]
+    assert len(paged_list) == 3
+    assert paged_list.fetches == 1
+
+
+@pytest.mark.parametrize(
+    'page_number, expected_items, expected_has_next', [
+        (1, [1, 2, 3], True),
+        (3, [7, 8, 9], True),
+        (4, [10], False),
+        (5, [], False),
+    ])
+def test_without_count_peeks_for_next_page(page_number, expected_items,
+                                           expected_has_next):
+    paged_list = SimplePagedList(list(range(1, 11)), page_number, 3,
+                                 with_count=False)
+    assert list(paged_list) == expected_items
+    assert paged_list.has_next_page == expected_has_next
+    assert paged_list.is_last_page != expected_has_next
+    assert paged_list.total_item_count is None
+    assert paged_list.page_count is None
+
+
+def test_without_count_item_numbers():
+    paged_list = SimplePagedList(list(range(1, 11)), 4, 3, with_count=False)
+    assert paged_list.first_item_on_page == 10
+    assert paged_list.last_item_on_page == 10
+
+
+def test_estimated_count_is_used_above_threshold():
+    query = FakeQuery(list(range(50)))
+    paged_list = PagedList(query, 2, 10, count_estimator=lambda q: 5000000,
+                           exact_count_threshold=1000)
+    assert paged_list.is_estimated_count
+    assert paged_list.total_item_count == 5000000
+    assert paged_list.metadata().is_estimated_count
+    assert query.count_calls == 0
+
+
+@pytest.mark.parametrize('estimate', [None, 999])
+def test_exact_count_is_used_below_threshold(estimate):
+    query = FakeQuery(list(range(50)))
+    paged_list = PagedList(query, 2, 10, count_estimator=lambda q: estimate,
+                           exact_count_threshold=1000)
+    assert not paged_list.is_estimated_count
+    assert paged_list.total_item_count == 50
+
+
+@pytest.mark.parametrize('prefetch', [0, 2])
+def test_iter_pages_counts_once(prefetch):
+    query = FakeQuery(list(range(25)))
+    pages = list(PagedList.iter_pages(query, 10, prefetch=prefetch))
+    assert [page.page_number for page in pages] == [1, 2, 3]
+    assert [list(page) for page in pages][2] == [20, 21, 22, 23, 24]
+    assert query.count_calls == 1
+
+
+@pytest.mark.parametrize('prefetch', [0, 1])
+def test_iter_items(prefetch):
+    items = SimplePagedList.iter_items(list(range(25)), 4, prefetch=prefetch)
+    assert list(items) == list(range(25))
+
+
+def test_iter_items_without_count():
+    query = FakeQuery(list(range(25)))
+    items = PagedList.iter_items(query, 10, with_count=False)
+    assert list(items) == list(range(25))
+    assert query.count_calls == 0
+
+
+@pytest.mark.parametrize('estimate', [15, 200])
+def test_iter_items_with_estimated_count(estimate):
+    query = FakeQuery(list(range(50)))
+    pages = list(PagedList.iter_pages(
+        query, 10, count_estimator=lambda q: estimate,
+        exact_count_threshold=10))
+    assert [item for page in pages for item in page] == list(range(50))
+    assert all(page.is_estimated_count for page in pages)
+    assert all(page.total_item_count == estimate for page in pages)
+    assert query.count_calls == 0
+
+
+def test_iter_pages_of_empty_superset():
+    assert list(SimplePagedList.iter_pages([], 10, prefetch=1)) == []
+
+
+def test_iter_pages_prefetch_propagates_errors():
+    class BrokenPagedList(SimplePagedList):
+        def _query_limit_offset_fn(self, query, limit, offset):
+            if offset:
+                raise RuntimeError('boom')
+            return query[offset:offset + limit]
+
+    pages = BrokenPagedList.iter_pages(list(range(25)), 10, prefetch=1)
+    assert list(next(pages)) == list(range(10))
+    with pytest.raises(RuntimeError):
+        next(pages)
+
+
+@pytest.mark.parametrize('page_number, with_count', [
+    (1, True), (2, True), (4, True), (9, True), (2, False), (4, False),
+])
+def test_metadata_matches_paged_list(page_number, with_count):
+    paged_list = SimplePagedList(list(range(10)), page_number, 3,
+                                 with_count=with_count)
+    metadata = paged_list.metadata()
+    for name in ['page_count', 'total_item_count', 'page_number', 'page_size',
+                 'has_previous_page', 'has_next_page', 'is_first_page',
+                 'is_last_page', 'first_item_on_page', 'last_item_on_page',
+                 'is_estimated_count']:
+        assert getattr(metadata, name) == getattr(paged_list, name), name
+
+
+@pytest.mark.parametrize('with_count', [True, False])
+def test_metadata_round_trips(with_count):
+    metadata = SimplePagedList(list(range(10)), 2, 3,
+                               with_count=with_count).metadata()
+    for copy in [PagedListMetaData.from_bytes(metadata.to_bytes()),
+                 PagedListMetaData.from_dict(metadata.to_dict()),
+                 pickle.loads(pickle.dumps(metadata))]:
+        assert copy.to_dict() == metadata.to_dict()
+
+
+def test_metadata_from_bytes_rejects_garbage():
+    with pytest.raises(ValueError):
+        PagedListMetaData.from_bytes(b'garbage')
+
+
+def _generate(n):
+    for i in range(n):
+        yield i
+
+
+def test_iterator_paged_list_without_count():
+    paged_list = IteratorPagedList(_generate(25), 2, 10)
+    assert list(paged_list) == list(range(10, 20))
+    assert paged_list.has_next_page
+    assert paged_list.total_item_count is None
+
+
+def test_iterator_paged_list_with_count():
+    paged_list = IteratorPagedList(_generate(25), 3, 10, count_fn=lambda: 25)
+    assert paged_list.page_count == 3
+    assert paged_list.is_last_page
+    assert list(paged_list) == list(range(20, 25))
+
+
+def test_iterator_paged_list_shares_iterator():
+    source = SharedIterator(_generate(25))
+    first = IteratorPagedList(source, 1, 10)
+    assert list(first) == list(range(10))
+    second = IteratorPagedList(source, 2, 10)
+    assert list(second) == list(range(10, 20))
+    third = IteratorPagedList(source, 3, 10)
+    assert list(third) == list(range(20, 25))
+    assert third.is_last_page
+    with pytest.raises(IndexError):
+        list(IteratorPagedList(source, 1, 10))
+
+
+def test_iterator_paged_list_iter_items():
+    items = IteratorPagedList.iter_items(_generate(25), 10)
+    assert list(items) == list(range(25))
+
+
+def test_view_of_list_does_not_copy():
+    data = list(range(1, 11))
+    paged_list = SimplePagedList(data, 2, 3, view=True)
+    assert isinstance(paged_list._subset, SequenceView)
+    assert list(paged_list) == [4, 5, 6]
+    assert paged_list[-1] == 6
+    assert paged_list.index(5) == 1
+    assert paged_list.count(5) == 1
+    assert list(reversed(paged_list)) == [6, 5, 4]
+    data[3] = 40
+    assert paged_list[0] == 40
+
+
+@pytest.mark.parametrize('data', [
+    bytes(bytearray(range(10))),
+    array.array('i', range(10)),
+])
+def test_view_of_buffer_is_memoryview(data):
+    paged_list = SimplePagedList(data, 2, 3, view=True)
+    assert isinstance(paged_list._subset, memoryview)
+    assert list(paged_list) == [3, 4, 5]
+    assert 4 in paged_list
+    assert paged_list.index(4) == 1
+    assert paged_list.count(4) == 1
+
+
+def test_view_without_count():
+    paged_list = SimplePagedList(list(range(10)), 4, 3, view=True,
+                                 with_count=False)
+    assert list(paged_list) == [9]
+    assert paged_list.is_last_page
+
+
+def test_sequence_view_slicing():
+    view = SequenceView(list(range(10)), 2, 8)
+    assert list(view[1:3]) == [3, 4]
+    assert view[::2] == [2, 4, 6]
+    with pytest.raises(IndexError):
+        view[6]
+
+
+def test_view_of_numpy_array():
+    numpy = pytest.importorskip('numpy')
+    data = numpy.arange(10)
+    paged_list = SimplePagedList(data, 2, 3, view=True)
+    assert paged_list._subset.base is data
+    assert paged_list.index(4) == 1
+    assert paged_list.count(4) == 1
+
+
+class RangeRecordingQuery(FakeQuery):
+    def __init__(self, items):
+        super(RangeRecordingQuery, self).__init__(items)
+        self.ranges = []
+
+    def all(self):
+        self.ranges.append((self._offset, self._limit))
+        return super(RangeRecordingQuery, self).all()
+
+
+def test_fetch_pages_uses_one_count_and_one_range():
+    query = RangeRecordingQuery(list(range(100)))
+    pages = PagedList.fetch_pages(query, [4, 2, 3, 20], 10)
+    assert [page.page_number for page in pages] == [4, 2, 3, 20]
+    assert [list(page)[0] for page in pages[:3]] == [30, 10, 20]
+    assert list(pages[3]) == []
+    assert pages[3].is_last_page
+    assert query.count_calls == 1
+    assert query.ranges == [(10, 30)]
+
+
+def test_fetch_pages_counts_without_fetching_on_executor():
+    futures = pytest.importorskip('concurrent.futures')
+    query = RangeRecordingQuery(list(range(100)))
+    with futures.ThreadPoolExecutor(max_workers=1) as executor:
+        pages = PagedList.fetch_pages(query, [1, 2], 10, executor=executor)
+    assert [list(page)[0] for page in pages] == [0, 10]
+    assert query.count_calls == 1
+    assert query.ranges == [(0, 20)]
+
+
+def test_fetch_pages_splits_ranges_with_max_gap():
+    query = RangeRecordingQuery(list(range(100)))
+    pages = PagedList.fetch_pages(query, [1, 3, 9], 10, max_gap=1)
+    assert [list(page)[-1] for page in pages] == [9, 29, 89]
+    assert query.ranges == [(0, 30), (80, 10)]
+
+
+def test_fetch_pages_of_simple_paged_list():
+    pages = SimplePagedList.fetch_pages(list(range(25)), [3, 1], 10)
+    assert [list(page) for page in pages] == [list(range(20, 25)),
+                                              list(range(10))]
+
+
+def test_fetch_pages_needs_a_count():
+    with pytest.raises(ValueError):
+        IteratorPagedList.fetch_pages(iter(range(50)), [1, 2], 10)
+    with pytest.raises(ValueError):
+        PagedList.fetch_pages(FakeQuery(list(range(50))), [1, 2], 10,
+                              with_count=False)
+
+
+def test_fetch_pages_with_estimated_count():
+    query = FakeQuery(list(range(50)))
+    pages = PagedList.fetch_pages(query, [1, 4], 10,
+                                  count_estimator=lambda q: 15,
+                                  exact_count_threshold=10)
+    assert all(page.is_estimated_count for page in pages)
+    assert list(pages[1]) == list(range(30, 40))
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+import io
+
+import genshi
+import pytest
+
+from pagedlist import PagedList
+from pagedlist import SimplePagedList
+from pagedlist import instrumentation
+from pagedlist.web.ajax import AjaxOptions
+from pagedlist.web.builder import Builder
+from pagedlist.web.options import CompiledRenderOptions
+from pagedlist.web.options import PagedListDisplayMode
+from pagedlist.web.options import PagedListRenderOptions
+from pagedlist.web.renderer import PagerRenderer
+from tests.fakes import FakeQuery
+
+PAGED_LISTS = [
+    SimplePagedList(list(range(1000)), 1, 10),
+    SimplePagedList(list(range(1000)), 30, 10),
+    SimplePagedList(list(range(1000)), 100, 10),
+    SimplePagedList(list(range(5)), 1, 10),
+    SimplePagedList([], 1, 10),
+    SimplePagedList(list(range(30)), 2, 10, with_count=False),
+    PagedList(FakeQuery(list(range(50))), 2, 10,
+              count_estimator=lambda q: 1234567, exact_count_threshold=1000),
+]
+
+
+def _url(page_number):
+    return '/items?page=%d&sort="name"' % page_number
+
+
+def _ajax(options):
+    return PagedListRenderOptions.enable_unobtrusive_ajax_replacing(
+        options, AjaxOptions(http_method='GET', insertion_mode='replace',
+                             update_target_id='items'))
+
+
+@pytest.mark.parametrize('ajax', [False, True])
+@pytest.mark.parametrize('preset', CompiledRenderOptions.presets)
+def test_renderer_matches_builder_for_presets(preset, ajax):
+    options = getattr(PagedListRenderOptions, preset)()
+    if ajax:
+        options = _ajax(options)
+    renderer = PagerRenderer(options)
+    assert renderer.is_compiled
+    for paged_list in PAGED_LISTS:
+        assert renderer.render(paged_list, _url) == \
+            Builder.paged_list_pager(paged_list, _url, options)
+
+
+def test_renderer_matches_builder_for_custom_options():
+    options = PagedListRenderOptions(
+        display=PagedListDisplayMode.IfNeeded,
+        display_link_to_first_page=PagedListDisplayMode.Always,
+        display_link_to_last_page=PagedListDisplayMode.Always,
+        display_page_count_and_current_location=True,
+        display_item_slice_and_total=True,
+        delimiter_between_page_numbers='<&>',
+        link_to_individual_page_format='#{0}',
+        class_to_apply_to_first_list_item_in_pager='first',
+        class_to_apply_to_last_list_item_in_pager='last',
+        container_div_classes=['a', 'b"c'],
+        li_element_classes=['x', 'y'],
+        page_count_and_current_location_format='Page {0} of {1} & more.')
+    renderer = PagerRenderer(options)
+    for paged_list in PAGED_LISTS:
+        assert renderer.render(paged_list, _url) == \
+            Builder.paged_list_pager(paged_list, _url, options)
+
+
+def test_renderer_escapes_page_number_text_but_not_markup():
+    paged_list = SimplePagedList(list(range(30)), 2, 10)
+    for display in (lambda n: '<%d>' % n,
+                    lambda n: genshi.core.Markup('<b>%d</b>' % n)):
+        options = PagedListRenderOptions(
+            function_to_display_each_page_number=display)
+        assert PagerRenderer(options).render(paged_list, _url) == \
+            Builder.paged_list_pager(paged_list, _url, options)
+
+
+def test_renderer_falls_back_to_builder_for_custom_transformers():
+    def transformer(li, a):
+        li(genshi.core.Markup(str(a(title='custom'))))
+        return li
+    options = PagedListRenderOptions(
+        function_to_transform_each_page_link=transformer)
+    renderer = PagerRenderer(options)
+    assert not renderer.is_compiled
+    paged_list = SimplePagedList(list(range(30)), 2, 10)
+    html = renderer.render(paged_list, _url)
+    assert 'title="custom"' in html
+    assert html == Builder.paged_list_pager(paged_list, _url, options)
+
+
+def test_renderer_writes_builder_markup_with_one_event():
+    def transformer(li, a):
+        return li
+    renderer = PagerRenderer(PagedListRenderOptions(
+        function_to_transform_each_page_link=transformer))
+    paged_list = SimplePagedList(list(range(30)), 2, 10)
+    events = []
+    with instrumentation.listening(events.append):
+        renderer.write(io.StringIO(), paged_list, _url)
+    assert [e.name for e in events] == [instrumentation.RENDER_PAGER]
+
+
+def test_renderer_does_not_render_unneeded_pager():
+    options = PagedListRenderOptions(display=PagedListDisplayMode.IfNeeded)
+    paged_list = SimplePagedList(list(range(5)), 1, 10)
+    assert PagerRenderer(options).render(paged_list, _url) is None
+
+
+def test_renderer_streams_the_same_markup():
+    renderer = PagerRenderer(PagedListRenderOptions.classic())
+    paged_list = SimplePagedList(list(range(1000)), 30, 10)
+    html = renderer.render(paged_list, _url)
+
+    chunks = list(renderer.iter_render(paged_list, _url))
+    assert len(chunks) > 10
+    assert ''.join(chunks) == html
+
+    output = io.StringIO()
+    renderer.write(output, paged_list, _url)
+    assert output.getvalue() == html
+
+    written = []
+    renderer.write(written.append, paged_list, _url)
+    assert written == chunks
+
+
+def test_renderer_streams_nothing_for_hidden_pagers():
+    options = PagedListRenderOptions(display=PagedListDisplayMode.IfNeeded)
+    paged_list = SimplePagedList(list(range(5)), 1, 10)
+    assert list(PagerRenderer(options).iter_render(paged_list, _url)) == []
+
+
+def test_renderer_with_url_template_matches_builder():
+    renderer = PagerRenderer(
+        PagedListRenderOptions.classic_plus_first_and_last())
+    paged_list = SimplePagedList(list(range(1000)), 30, 10)
+    expected = renderer.render(paged_list, _url)
+    assert renderer.render(
+        paged_list, '/items?page={page}&sort="name"') == expected
+    assert ''.join(renderer.iter_render(
+        paged_list, ('/items?page=', '&sort="name"'))) == expected
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+sqlalchemy = pytest.importorskip('sqlalchemy')
+
+from sqlalchemy import Column
+from sqlalchemy import ForeignKey
+from sqlalchemy import Integer
+from sqlalchemy import String
+from sqlalchemy import create_engine
+from sqlalchemy import event
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import relationship
+from sqlalchemy.orm import sessionmaker
+
+try:
+    from sqlalchemy.orm import declarative_base
+except ImportError:
+    from sqlalchemy.ext.declarative import declarative_base
+
+from pagedlist import CountCache
+from pagedlist import PageCache
+from pagedlist import PagedList
+from pagedlist import instrumentation
+from pagedlist.sqla import _explain_json
+from pagedlist.sqla import optimized_count
+from pagedlist.sqla import postgresql_planner_estimate
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = 'items'
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    comments = relationship('Comment')
+
+
+class Comment(Base):
+    __tablename__ = 'comments'
+    id = Column(Integer, primary_key=True)
+    item_id = Column(Integer, ForeignKey('items.id'))
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([Item(id=i, name='item %d' % i) for i in range(1, 26)])
+    session.add_all([Comment(item_id=i % 5 + 1) for i in range(12)])
+    session.commit()
+    session.close()
+    return engine
+
+
+@pytest.fixture
+def statements(engine):
+    statements = []
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    return statements
+
+
+@pytest.fixture
+def session(engine):
+    return sessionmaker(bind=engine)()
+
+
+def test_window_count_takes_one_statement(session, statements):
+    query = session.query(Item).order_by(Item.id)
+    paged_list = PagedList(query, 2, 10, window_count=True)
+    assert paged_list.total_item_count == 25
+    assert [item.id for item in paged_list] == list(range(11, 21))
+    assert len(statements) == 1
+
+
+@pytest.mark.parametrize('build', [
+    lambda q: q.query(Item.id, Item.name),
+    lambda q: q.query(Item.id),
+    lambda q: q.query(Item.id).distinct(),
+    lambda q: q.query(Item, Item.name),
+])
+def test_window_count_keeps_rows_of_other_queries(session, build):
+    query = build(session).order_by(Item.id)
+    paged_list = PagedList(query, 3, 10, window_count=True)
+    expected = query.limit(10).offset(20).all()
+    assert list(paged_list) == expected
+    assert [type(row) for row in paged_list] == \
+        [type(row) for row in expected]
+    assert paged_list.page_count == 3
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'count_estimator': lambda query: None},
+    {'page_cache': PageCache()},
+])
+def test_window_count_rejects_estimates_and_page_cache(session, kwargs):
+    with pytest.raises(ValueError):
+        PagedList(session.query(Item), 1, 10, window_count=True, **kwargs)
+
+
+def test_window_count_emits_fetch_event(session):
+    query = session.query(Item).order_by(Item.id)
+    events = []
+    with instrumentation.listening(events.append):
+        list(PagedList(query, 2, 10, window_count=True))
+    assert [(e.name, e.page_number, e.offset, e.row_count)
+            for e in events] == [(instrumentation.FETCH, 2, 10, 10)]
+
+
+def test_fetch_pages_with_window_count_fetches_once(session, statements):
+    query = session.query(Item).order_by(Item.id)
+    pages = PagedList.fetch_pages(query, [1, 2], 10, window_count=True)
+    assert [page[0].id for page in pages] == [1, 11]
+    assert len(statements) == 2
+    assert 'OVER' not in ' '.join(statements).upper()
+
+
+def test_window_count_falls_back_past_the_end(session, statements):
+    query = session.query(Item).order_by(Item.id)
+    paged_list = PagedList(query, 5, 10, window_count=True)
+    assert paged_list.total_item_count == 25
+    assert list(paged_list) == []
+    assert len(statements) == 2
+
+
+def test_window_count_fills_count_cache(session, statements):
+    cache = CountCache()
+    query = session.query(Item).order_by(Item.id)
+    PagedList(query, 1, 10, window_count=True, count_cache=cache)
+    PagedList(query, 5, 10, window_count=True, count_cache=cache)
+    assert cache.hits == 1
+    assert len(statements) == 2
+
+
+@pytest.mark.parametrize('build', [
+    lambda q: q.query(Item),
+    lambda q: q.query(Item).filter(Item.id > 7),
+    lambda q: q.query(Item).join(Item.comments),
+    lambda q: q.query(Item).join(Item.comments).distinct(),
+    lambda q: q.query(Item.name).filter(Item.id < 4),
+    lambda q: q.query(Item.id, func.count(Comment.id))
+    .join(Item.comments).group_by(Item.id),
+    lambda q: q.query(Item).limit(3),
+    lambda q: q.query(Item).order_by(Item.id).offset(20),
+    lambda q: q.query(Item).order_by(Item.id).limit(10).offset(20),
+])
+def test_optimized_count_matches_count(session, build):
+    query = build(session)
+    assert optimized_count(query) == query.count()
+
+
+def test_optimized_count_strips_order_by_and_eager_loads(session, statements):
+    query = session.query(Item).options(joinedload(Item.comments)) \
+        .order_by(Item.name)
+    assert optimized_count(query) == 25
+    statement = statements[-1].upper()
+    assert 'ORDER BY' not in statement
+    assert 'JOIN' not in statement
+    assert '(SELECT' not in statement
+
+
+def test_count_fn(session, statements):
+    query = session.query(Item).order_by(Item.name)
+    paged_list = PagedList(query, 1, 10, count_fn=optimized_count)
+    assert paged_list.total_item_count == 25
+    assert 'ORDER BY' not in statements[-1].upper()
+
+
+def test_planner_estimate_explains_expanded_parameters(session):
+    from sqlalchemy.dialects import postgresql
+
+    query = session.query(Item).filter(Item.id.in_([1, 2, 3]))
+    compiled = _explain_json(query.statement).compile(
+        dialect=postgresql.dialect(),
+        compile_kwargs={'render_postcompile': True})
+    sql = str(compiled)
+    assert sql.startswith('EXPLAIN (FORMAT JSON) SELECT items.id')
+    assert 'POSTCOMPILE' not in sql
+    assert sorted(compiled.params.values()) == [1, 2, 3]
+
+
+def test_planner_estimate_is_none_on_other_databases(session):
+    assert postgresql_planner_estimate(session.query(Item)) is None
+
+
+def test_planner_estimate_is_none_if_explain_fails(
+        engine, session, monkeypatch):
+    # SQLite does not understand EXPLAIN (FORMAT JSON).
+    monkeypatch.setattr(engine.dialect, 'name', 'postgresql')
+    query = session.query(Item).order_by(Item.id)
+    assert postgresql_planner_estimate(query) is None
+    paged_list = PagedList(query, 1, 10,
+                           count_estimator=postgresql_planner_estimate)
+    assert paged_list.total_item_count == 25